@@ -0,0 +1,91 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from agent.langGraphRouter import build_graph
+from agent.config import BATCH_PARALLELISM
+from agent.startup import start_warm_up
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """Run many utterances through the BitBud graph in two phases.
+
+    1. Routing (pre-routers, planner, router) for all inputs concurrently, `parallelism` at a time.
+       Ollama only generates in parallel when the server allows it (OLLAMA_NUM_PARALLEL).
+    2. Tool execution one input at a time, in input order, since tools have side effects
+       (volume, alarms, emails) that a replayed log expects to happen in sequence.
+    """
+
+    def __init__(self, routing_mode: str = None, parallelism: int = None):
+        self.parallelism = parallelism or BATCH_PARALLELISM
+        self.route_graph = build_graph(routing_mode, stage="route")
+        self.execute_graph = build_graph(routing_mode, stage="execute")
+        start_warm_up()
+
+    def _route(self, user_input: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            state = self.route_graph.invoke({"input": user_input, "user_id": user_id})
+            error = None
+        except Exception as e:
+            logger.exception(f"Batch routing failed for: {user_input}")
+            state, error = None, str(e)
+        return {"state": state, "error": error, "route_ms": (time.perf_counter() - start) * 1000}
+
+    def run(self, inputs: List[str], parallelism: Optional[int] = None,
+            user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Returns one {"input", "reply", "tool_chain", "timings"} dict per input, in input order.
+        All inputs are answered from (and stored to) the memory of `user_id`."""
+        parallelism = max(1, min(parallelism or self.parallelism, len(inputs) or 1))
+
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="mitchi-batch") as pool:
+            routed = list(pool.map(lambda user_input: self._route(user_input, user_id), inputs))
+
+        results = []
+        for user_input, route in zip(inputs, routed):
+            result = {
+                "input": user_input,
+                "reply": None,
+                "tool_chain": route["state"].get("tool_chain", []) if route["state"] else [],
+                "timings": {"route_ms": round(route["route_ms"], 2), "execute_ms": 0.0}
+            }
+
+            if route["error"] is None:
+                start = time.perf_counter()
+                try:
+                    state = self.execute_graph.invoke(route["state"])
+                    result["reply"] = state.get("output", "I'm having trouble processing that right now.")
+                except Exception as e:
+                    logger.exception(f"Batch execution failed for: {user_input}")
+                    result["error"] = str(e)
+                result["timings"]["execute_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            else:
+                result["error"] = route["error"]
+
+            result["timings"]["total_ms"] = round(result["timings"]["route_ms"] + result["timings"]["execute_ms"], 2)
+            results.append(result)
+
+        return results
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_batch_runner() -> BatchRunner:
+    global _runner
+
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = BatchRunner()
+    return _runner
+
+
+def ask_batch(inputs: List[str], parallelism: Optional[int] = None,
+              user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Python API for bulk replay/warm-up: route `inputs` concurrently, execute in order."""
+    return get_batch_runner().run(inputs, parallelism, user_id)
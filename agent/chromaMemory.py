@@ -1,107 +1,224 @@
 import os
+import json
+import time
 import uuid
+import struct
+import hashlib
+import itertools
 import logging
+import threading
 import chromadb
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import numpy as np
 from agent.llm import llm
 from chromadb import Client
 from datetime import datetime, timedelta
 from chromadb.config import Settings
 from langchain.vectorstores import Chroma
 from chromadb.utils import embedding_functions
-from langchain.embeddings import HuggingFaceEmbeddings
-from agent.llm import build_rag_prompt, generate_context_summary
+from agent.llm import build_rag_prompt, generate_context_summary, generate_context_summaries, generate_session_digest
+from agent.memory_ingest import get_ingest_queue
+from agent.rerank import rerank, cosine_similarities
+from agent.embedding_cache import wrap_embeddings
+from agent.embeddings import create_embeddings
+from agent.vector_store import AdaptiveVectorStore, NumpyVectorStore
+from agent.session_buffer import SessionBuffer, get_session_buffers
+from agent.lexical_index import get_lexical_index, tokenize
+from agent.config import (DEFAULT_USER_ID, MEMORY_INGEST_ASYNC, MEMORY_RETENTION_DAYS, MEMORY_CLEANUP_BATCH_SIZE,
+                          MEMORY_DEDUP_THRESHOLD, MEMORY_DIGEST_AFTER_DAYS, MEMORY_DIGEST_MIN_ENTRIES,
+                          EMBEDDING_CACHE_ENABLED, ABOUT_CHECK_INTERVAL, VECTOR_BACKEND, NUMPY_STORE_MAX_ROWS,
+                          SNAPSHOT_BATCH_SIZE, SNAPSHOT_WARM_START_PATH,
+                          RETRIEVAL_SCORER, RETRIEVAL_SCORE_THRESHOLD, RETRIEVAL_FETCH_K,
+                          RETRIEVAL_RECENCY_HALF_LIFE_HOURS, RETRIEVAL_RECENCY_WEIGHT, RETRIEVAL_SESSION_BOOST,
+                          RETRIEVAL_CONTEXT_BOOST, RETRIEVAL_MMR_LAMBDA, RETRIEVAL_RRF_K)
+from agent.streaming import is_streaming, emit_event
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 
 logger = logging.getLogger(__name__)
 
-try:
-    embedding_func = HuggingFaceEmbeddings(
-        model_name="/home/ayush/Documents/bitbud/models/paraphrase-MiniLM-L3-v2/"
-    )
-    logger.info("Embedding function initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize embedding function: {e}")
-    embedding_func = None
-
+embedding_func = None
 vectorstore = None
 about_store = None
+context_store = None  # Embedded context summaries, same ids as the memories in `vectorstore`
 
-try:
-    vectorstore = Chroma(
-        collection_name="bitbud",
-        embedding_function=embedding_func,
-        persist_directory="./bitbud_memory"
-    )
-    logger.info("Main vectorstore initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize main vectorstore: {e}")
-
-try:
-    about_store = Chroma(
-        collection_name="about_user",
-        embedding_function=embedding_func,
-        persist_directory="./chroma_about"
+_memory_lock = threading.Lock()
+_memory_initialized = False
+
+
+def _open_small_store(collection_name: str, persist_directory: str):
+    """Store for a collection expected to stay small: in-process NumPy until it outgrows NUMPY_STORE_MAX_ROWS."""
+    def open_chroma():
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=embedding_func,
+            persist_directory=persist_directory
+        )
+
+    if VECTOR_BACKEND == "chroma":
+        return open_chroma()
+    return AdaptiveVectorStore(
+        embedding_func,
+        numpy_path=os.path.join(persist_directory, collection_name),
+        chroma_factory=open_chroma,
+        max_numpy_rows=NUMPY_STORE_MAX_ROWS
     )
-    logger.info("About vectorstore initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize about vectorstore: {e}")
 
 
-ABOUT_FILE = "ABOUT.md"
-_about_last_modified = None
-_current_session_id = None
-_last_interaction_time = None
+def init_memory():
+    """Load the embedding model, open the Chroma stores and run the one-time metadata migrations.
+    Runs once, normally from the startup warm-up."""
+    global embedding_func, vectorstore, about_store, context_store, _memory_initialized
+
+    with _memory_lock:
+        if _memory_initialized:
+            return
+
+        try:
+            # Backend, model path, batch size, threads and max sequence length come from EMBEDDING_* config
+            embedding_func = create_embeddings()
+            if EMBEDDING_CACHE_ENABLED:
+                # Shared by every store and the embedding routers, so a text is embedded once
+                embedding_func = wrap_embeddings(embedding_func)
+            logger.info("Embedding function initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize embedding function: {e}")
+            embedding_func = None
+
+        try:
+            vectorstore = Chroma(
+                collection_name="bitbud",
+                embedding_function=embedding_func,
+                persist_directory="./bitbud_memory"
+            )
+            logger.info("Main vectorstore initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize main vectorstore: {e}")
+
+        try:
+            context_store = Chroma(
+                collection_name="bitbud_context",
+                embedding_function=embedding_func,
+                persist_directory="./bitbud_memory"
+            )
+            logger.info("Context vectorstore initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize context vectorstore: {e}")
+
+        try:
+            about_store = _open_small_store("about_user", "./chroma_about")
+            logger.info("About vectorstore initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize about vectorstore: {e}")
+
+        if vectorstore is not None:
+            # Before any retrieval: filters on user_id would hide pre-namespace memories until the backfill ran
+            try:
+                migrate_memory_metadata()
+            except Exception as e:
+                logger.error(f"Failed to migrate memory metadata: {e}")
+
+        _memory_initialized = True
+
+
+def get_embedding_func():
+    """The shared embedding model, waiting for the warm-up to load it if needed."""
+    init_memory()
+    return embedding_func
+
+
+class _UserSession:
+    """Session tracking of one user; its own lock, so users never wait on each other."""
+    __slots__ = ("lock", "session_id", "last_interaction_time")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.session_id = None
+        self.last_interaction_time = None
+
+
+_user_sessions: dict = {}  # user_id -> _UserSession
+
 
-def _get_current_session_id():
-    """Generate session ID based on time gaps (1 hour = new session)"""
-    global _current_session_id, _last_interaction_time
+def _get_current_session_id(user_id: str = None):
+    """Generate session ID per user based on time gaps (1 hour = new session)"""
+    user_id = user_id or DEFAULT_USER_ID
+    # dict.get/setdefault are atomic, so no global lock is needed to create a user's entry
+    session = _user_sessions.get(user_id) or _user_sessions.setdefault(user_id, _UserSession())
 
     now = datetime.now()
+    with session.lock:
+        if (session.last_interaction_time is None or
+            (now - session.last_interaction_time).total_seconds() > 3600):
+            # New session if no last interaction or more than 1 hour gap
+            session.session_id = str(uuid.uuid4())[:8] # Shorten UUID for session ID
+            print(f"[Memory] New session started for {user_id}: {session.session_id}")
 
-    if (_last_interaction_time is None or
-        (now - _last_interaction_time).total_seconds() > 3600):
-        # New session if no last interaction or more than 1 hour gap
-        _current_session_id = str(uuid.uuid4())[:8] # Shorten UUID for session ID
-        print(f"[Memory] New session started: {_current_session_id}")
+        session.last_interaction_time = now
+        return session.session_id
 
-    _last_interaction_time = now
-    return _current_session_id
 
-def _load_about_if_changed():
-    """Load the ABOUT.md file if it has changed since last load."""
-    global _about_last_modified, about_store
+ABOUT_FILE = "ABOUT.md"
+_about_lock = threading.Lock()
+_about_signature = None  # (mtime_ns, size) of the ABOUT.md last synced
+_about_last_check = None
+
+
+def _about_chunk_id(chunk: str) -> str:
+    return hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+
 
-    if not os.path.exists(ABOUT_FILE):
-        print(f"[Memory] About file '{ABOUT_FILE}' not found.")
+def sync_about_file(force: bool = False):
+    """Bring about_store in line with ABOUT.md, embedding only added chunks and deleting removed ones.
+
+    The file is stat'ed at most once per ABOUT_CHECK_INTERVAL seconds and re-split only when
+    its mtime or size changed, so this is cheap to call on every request.
+    """
+    global _about_signature, _about_last_check
+
+    if about_store is None:
         return
 
-    _current_mod_time = os.path.getmtime(ABOUT_FILE)
+    now = time.monotonic()
+    if not force and _about_last_check is not None and now - _about_last_check < ABOUT_CHECK_INTERVAL:
+        return
 
-    # Reloading if the file was modified
-    if _about_last_modified != _current_mod_time:
-        print(f"[Memory] About file '{ABOUT_FILE}' was modified, reloading...")
-        _about_last_modified = _current_mod_time
+    with _about_lock:
+        if not force and _about_last_check is not None and now - _about_last_check < ABOUT_CHECK_INTERVAL:
+            return
+        _about_last_check = now
+
+        try:
+            stat = os.stat(ABOUT_FILE)
+        except FileNotFoundError:
+            if _about_signature != "missing":
+                print(f"[Memory] About file '{ABOUT_FILE}' not found.")
+                _about_signature = "missing"
+            return
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == _about_signature:
+            return
 
         with open(ABOUT_FILE, "r") as f:
             about_text = f.read().strip()
-            if about_text:
-                splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-                chunks = splitter.split_text(about_text)
-                about_store.add_texts(chunks)
-                print(f"[Memory] Loaded {len(chunks)} chunks from ABOUT.md")
-            else:
-                chunks = []
-                print("[Memory] About file was found empty, no chunks added.")
-
-        about_store.delete_collection()
-        about_store = Chroma(
-            collection_name="about_user",
-            embedding_function=embedding_func,
-            persist_directory="./chroma_about"
-        )
-        about_store.add_texts(chunks)
+
+        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+        chunks = {_about_chunk_id(chunk): chunk for chunk in splitter.split_text(about_text)} if about_text else {}
+
+        stored_ids = set(about_store.get(include=[])["ids"])
+        added = [chunk_id for chunk_id in chunks if chunk_id not in stored_ids]
+        removed = [chunk_id for chunk_id in stored_ids if chunk_id not in chunks]
+
+        if removed:
+            about_store.delete(removed)
+        if added:
+            about_store.add_texts([chunks[chunk_id] for chunk_id in added], ids=added)
+
+        _about_signature = signature
+        print(f"[Memory] Synced ABOUT.md: {len(chunks)} chunks, {len(added)} added, {len(removed)} removed")
+
 
 def is_worth_storing(text: str) -> bool:
     """Filter out trivial messages that don't need long-term storage"""
@@ -125,78 +242,532 @@ def is_worth_storing(text: str) -> bool:
     
     return True
 
-def cleanup_old_memories(days_to_keep=45):
-    """Remove memories older than 45 days"""
-    cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-    cutoff_iso = cutoff_date.isoformat()
-    
+TIMESTAMP_BACKFILL_MARKER = "./bitbud_memory/.timestamp_epoch_backfilled"
+USER_ID_BACKFILL_MARKER = "./bitbud_memory/.user_id_backfilled"
+
+
+def _backfill_metadata(marker: str, fill, batch_size: int) -> int:
+    """Page through the main store once, updating each metadata `fill` returns a new version of."""
+    if os.path.exists(marker):
+        return 0
+
+    collection = vectorstore._collection
+    updated = 0
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+
+        ids, metadatas = [], []
+        for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+            filled = fill(metadata or {})
+            if filled is not None:
+                ids.append(doc_id)
+                metadatas.append(filled)
+        if ids:
+            collection.update(ids=ids, metadatas=metadatas)
+            updated += len(ids)
+
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, "w") as f:
+        f.write(datetime.now().isoformat())
+    return updated
+
+
+def _fill_timestamp_epoch(metadata: dict):
+    if "timestamp_epoch" in metadata or "timestamp" not in metadata:
+        return None
     try:
-        all_docs = vectorstore.get()
-        
-        # Find old documents
-        old_doc_ids = []
-        for i, metadata in enumerate(all_docs['metadatas']):
-            if metadata and 'timestamp' in metadata:
-                if metadata['timestamp'] < cutoff_iso:
-                    old_doc_ids.append(all_docs['ids'][i])
-        
-        # Delete old documents
-        if old_doc_ids:
-            vectorstore.delete(old_doc_ids)
-            print(f"[Memory] Cleaned up {len(old_doc_ids)} old memories")
-            
+        return {**metadata, "timestamp_epoch": datetime.fromisoformat(metadata["timestamp"]).timestamp()}
+    except ValueError:
+        return None
+
+
+def _fill_user_id(metadata: dict):
+    return None if "user_id" in metadata else {**metadata, "user_id": DEFAULT_USER_ID}
+
+
+def migrate_memory_metadata(batch_size: int = 500):
+    """One-time migrations of memories stored by older versions (each guarded by a marker file):
+    timestamp_epoch from the ISO timestamp, and user_id = DEFAULT_USER_ID for pre-namespace memories."""
+    updated = _backfill_metadata(TIMESTAMP_BACKFILL_MARKER, _fill_timestamp_epoch, batch_size)
+    if updated:
+        print(f"[Memory] Backfilled timestamp_epoch on {updated} memories")
+    updated = _backfill_metadata(USER_ID_BACKFILL_MARKER, _fill_user_id, batch_size)
+    if updated:
+        print(f"[Memory] Assigned {updated} memories to user {DEFAULT_USER_ID}")
+    _build_lexical_index(batch_size)
+
+
+def _build_lexical_index(batch_size: int):
+    """Index every stored memory when the lexical index is empty (first run, or its file was removed)."""
+    index = get_lexical_index()
+    if index is None or len(index) or not vectorstore._collection.count():
+        return
+
+    offset = 0
+    while True:
+        page = vectorstore._collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+        _index_memories(page["ids"], page["documents"], page["metadatas"])
+    print(f"[Memory] Built lexical index over {len(index)} memories")
+
+
+def _index_memories(ids: list, texts: list, metadatas: list):
+    index = get_lexical_index()
+    if index is not None:
+        metadatas = [metadata or {} for metadata in metadatas]
+        index.add(ids, texts, [metadata.get("context") for metadata in metadatas],
+                  [metadata.get("user_id", DEFAULT_USER_ID) for metadata in metadatas])
+
+
+def _unindex_memories(ids: list):
+    index = get_lexical_index()
+    if index is not None:
+        index.delete(ids)
+
+
+def cleanup_old_memories(days_to_keep=None, batch_size=None) -> int:
+    """Delete memories older than `days_to_keep` days, in batches, using a timestamp_epoch filter in the store."""
+    days_to_keep = MEMORY_RETENTION_DAYS if days_to_keep is None else days_to_keep
+    batch_size = batch_size or MEMORY_CLEANUP_BATCH_SIZE
+    cutoff = time.time() - days_to_keep * 24 * 3600
+
+    migrate_memory_metadata(batch_size)
+
+    deleted = 0
+    while True:
+        expired = vectorstore._collection.get(where={"timestamp_epoch": {"$lt": cutoff}}, limit=batch_size, include=[])
+        if not expired["ids"]:
+            break
+
+        vectorstore.delete(expired["ids"])
+        if context_store is not None:
+            context_store.delete(expired["ids"])
+        _unindex_memories(expired["ids"])
+        deleted += len(expired["ids"])
+        print(f"[Memory] Cleanup: deleted {deleted} expired memories so far...")
+
+    if deleted:
+        print(f"[Memory] Cleaned up {deleted} old memories")
+    return deleted
+
+
+def consolidate_old_sessions(min_age_days=None, min_entries=None, batch_size=None) -> int:
+    """Replace each session older than `min_age_days` having at least `min_entries` memories by one digest memory.
+
+    Returns the number of memories folded into digests.
+    """
+    min_age_days = MEMORY_DIGEST_AFTER_DAYS if min_age_days is None else min_age_days
+    min_entries = min_entries or MEMORY_DIGEST_MIN_ENTRIES
+    batch_size = batch_size or MEMORY_CLEANUP_BATCH_SIZE
+    cutoff = time.time() - min_age_days * 24 * 3600
+
+    sessions = {}
+    where = {"$and": [{"timestamp_epoch": {"$lt": cutoff}}, {"source": {"$ne": "digest"}}]}
+    offset = 0
+    while True:
+        page = vectorstore._collection.get(where=where, include=["documents", "metadatas"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+        for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            if metadata.get("session_id"):
+                key = (metadata.get("user_id", DEFAULT_USER_ID), metadata["session_id"])
+                sessions.setdefault(key, []).append((doc_id, document, metadata))
+
+    digested = 0
+    for (user_id, session_id), entries in sessions.items():
+        if len(entries) < min_entries:
+            continue
+
+        entries.sort(key=lambda entry: entry[2].get("timestamp_epoch", 0))
+        digest = generate_session_digest([document for _, document, _ in entries])
+        if not digest:
+            continue
+
+        latest = entries[-1][2]
+        metadata = {
+            "source": "digest",
+            "user_id": user_id,
+            "session_id": session_id,
+            "context": digest,
+            "timestamp": latest.get("timestamp", datetime.fromtimestamp(latest["timestamp_epoch"]).isoformat()),
+            "timestamp_epoch": latest["timestamp_epoch"],
+            "last_seen": max(entry[2].get("last_seen", entry[2]["timestamp_epoch"]) for entry in entries),
+            "hit_count": sum(entry[2].get("hit_count", 1) for entry in entries),
+            "digest_of": len(entries)
+        }
+        ids = vectorstore.add_texts(texts=[digest], metadatas=[metadata])
+        _store_contexts([(ids[0], digest)])
+        _index_memories(ids, [digest], [metadata])
+
+        old_ids = [doc_id for doc_id, _, _ in entries]
+        vectorstore.delete(old_ids)
+        if context_store is not None:
+            context_store.delete(old_ids)
+        _unindex_memories(old_ids)
+        digested += len(entries)
+        print(f"[Memory] Digested session {session_id}: {len(entries)} memories -> 1")
+
+    return digested
+
+
+# --- Snapshots: <path>/manifest.json plus, per collection, embeddings.npy (float32 rows) and
+# records.jsonl (one {"id", "document", "metadata"} line per row, in the same order)
+SNAPSHOT_COLLECTIONS = ("bitbud", "bitbud_context", "about_user")
+_NPY_HEADER_BYTES = 128
+
+
+def _snapshot_stores() -> dict:
+    return {"bitbud": vectorstore, "bitbud_context": context_store, "about_user": about_store}
+
+
+def _embedding_model_name() -> str:
+    # CachedEmbeddings exposes `model`, a bare backend `model_name`
+    return str(getattr(embedding_func, "model_name", None) or getattr(embedding_func, "model", ""))
+
+
+def _npy_header(rows: int, dim: int) -> bytes:
+    """Fixed-size .npy header, so it can be rewritten with the final row count once streaming is done."""
+    text = repr({"descr": "<f4", "fortran_order": False, "shape": (rows, dim)})
+    text += " " * (_NPY_HEADER_BYTES - 10 - len(text) - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def _store_pages(store, batch_size: int, where: dict = None):
+    """(ids, documents, metadatas, embeddings) pages of a Chroma store or an AdaptiveVectorStore."""
+    backend = getattr(store, "backend", store)
+    if isinstance(backend, NumpyVectorStore):
+        rows = backend.get(include=["documents", "metadatas", "embeddings"])
+        for start in range(0, len(rows["ids"]), batch_size):
+            end = start + batch_size
+            yield rows["ids"][start:end], rows["documents"][start:end], rows["metadatas"][start:end], rows["embeddings"][start:end]
+        return
+
+    offset = 0
+    while True:
+        page = backend._collection.get(where=where, include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+        yield page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+
+
+def _pages_by_id(store, ids_path: str, batch_size: int):
+    """Pages of `store` holding the ids listed in another collection's records.jsonl, read as a stream."""
+    with open(ids_path, "r", encoding="utf-8") as f:
+        while True:
+            ids = [json.loads(line)["id"] for line in itertools.islice(f, batch_size)]
+            if not ids:
+                break
+            page = store._collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+            if page["ids"]:
+                yield page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+
+
+def _write_snapshot_collection(directory: str, pages) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    rows, dim = 0, 0
+    with open(os.path.join(directory, "embeddings.npy"), "wb") as vectors_file, \
+            open(os.path.join(directory, "records.jsonl"), "w", encoding="utf-8") as records_file:
+        vectors_file.write(_npy_header(0, 0))
+        for ids, documents, metadatas, embeddings in pages:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            dim = dim or embeddings.shape[1]
+            vectors_file.write(embeddings.tobytes())
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                records_file.write(json.dumps({"id": doc_id, "document": document, "metadata": metadata}) + "\n")
+            rows += len(ids)
+        vectors_file.seek(0)
+        vectors_file.write(_npy_header(rows, dim))
+    return {"rows": rows, "dim": dim}
+
+
+def export_snapshot(path: str, user_id: str = None, batch_size: int = None) -> dict:
+    """Write ids, texts, metadata and raw embeddings of the memory stores under `path`.
+
+    Rows are streamed `batch_size` at a time, so collections larger than RAM can be exported.
+    With `user_id`, only that user's memories are exported (and ABOUT.md chunks only for the owner).
+    Returns the rows written per collection.
+    """
+    init_memory()
+    batch_size = batch_size or SNAPSHOT_BATCH_SIZE
+    start = time.perf_counter()
+
+    collections = {}
+    memories_dir = os.path.join(path, "bitbud")
+    collections["bitbud"] = _write_snapshot_collection(
+        memories_dir, _store_pages(vectorstore, batch_size, where={"user_id": user_id} if user_id else None)
+    )
+    if context_store is not None:
+        context_pages = (_pages_by_id(context_store, os.path.join(memories_dir, "records.jsonl"), batch_size)
+                         if user_id else _store_pages(context_store, batch_size))
+        collections["bitbud_context"] = _write_snapshot_collection(os.path.join(path, "bitbud_context"), context_pages)
+    if about_store is not None and (user_id or DEFAULT_USER_ID) == DEFAULT_USER_ID:
+        collections["about_user"] = _write_snapshot_collection(os.path.join(path, "about_user"), _store_pages(about_store, batch_size))
+
+    # Written last: a snapshot without a manifest is incomplete and refused by import_snapshot
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": 1,
+            "created": datetime.now().isoformat(),
+            "model": _embedding_model_name(),
+            "user_id": user_id,
+            "collections": collections
+        }, f, indent=2)
+
+    print(f"[Memory] Exported snapshot to {path} in {(time.perf_counter() - start) * 1000:.0f} ms: "
+          + ", ".join(f"{name} {info['rows']}" for name, info in collections.items()))
+    return {name: info["rows"] for name, info in collections.items()}
+
+
+def _read_snapshot_collection(directory: str, rows: int, batch_size: int):
+    """(ids, documents, metadatas, embeddings) pages of a snapshot collection; embeddings are memory-mapped."""
+    if not rows:
+        return
+    embeddings = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+    with open(os.path.join(directory, "records.jsonl"), "r", encoding="utf-8") as f:
+        offset = 0
+        while offset < rows:
+            records = [json.loads(line) for line in itertools.islice(f, min(batch_size, rows - offset))]
+            if not records:
+                break
+            yield ([record["id"] for record in records], [record["document"] for record in records],
+                   [record["metadata"] for record in records], np.asarray(embeddings[offset:offset + len(records)]))
+            offset += len(records)
+
+
+def _add_precomputed(store, ids: list, documents: list, metadatas: list, embeddings: np.ndarray):
+    if isinstance(store, AdaptiveVectorStore):
+        store.add_embeddings(ids, embeddings, documents, metadatas)
+        return
+    add = {"ids": ids, "embeddings": embeddings.tolist(), "documents": documents}
+    if any(metadatas):
+        add["metadatas"] = [metadata or {"source": "unknown"} for metadata in metadatas]
+    store._collection.upsert(**add)
+
+
+def import_snapshot(path: str, user_id: str = None, batch_size: int = None) -> dict:
+    """Bulk-load a snapshot written by export_snapshot, without re-embedding anything.
+
+    Rows are upserted by id, so importing twice is harmless. Embeddings are memory-mapped and rows
+    are read `batch_size` at a time. With `user_id`, the imported memories are moved to that user.
+    Returns the rows imported per collection.
+    """
+    init_memory()
+    batch_size = batch_size or SNAPSHOT_BATCH_SIZE
+    start = time.perf_counter()
+
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No complete snapshot at {path} (manifest.json missing)")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    model = _embedding_model_name()
+    if manifest.get("model") and model and manifest["model"] != model:
+        raise ValueError(f"Snapshot was embedded with {manifest['model']}, this install uses {model}")
+
+    stores = _snapshot_stores()
+    imported = {}
+    for name, info in manifest["collections"].items():
+        store = stores.get(name)
+        if store is None:
+            logger.warning(f"Skipping snapshot collection {name}: store not available")
+            continue
+
+        imported[name] = 0
+        for ids, documents, metadatas, embeddings in _read_snapshot_collection(os.path.join(path, name), info["rows"], batch_size):
+            if name == "bitbud":
+                # Memories exported before the metadata migrations get the same fields as stored ones
+                metadatas = [_fill_timestamp_epoch(metadata or {}) or dict(metadata or {}) for metadata in metadatas]
+                for metadata in metadatas:
+                    metadata["user_id"] = user_id or metadata.get("user_id", DEFAULT_USER_ID)
+            _add_precomputed(store, ids, documents, metadatas, embeddings)
+            if name == "bitbud":
+                _index_memories(ids, documents, metadatas)
+            imported[name] += len(ids)
+
+    print(f"[Memory] Imported snapshot from {path} in {(time.perf_counter() - start) * 1000:.0f} ms: "
+          + ", ".join(f"{name} {rows}" for name, rows in imported.items()))
+    return imported
+
+
+def warm_start_from_snapshot() -> dict:
+    """Import SNAPSHOT_WARM_START_PATH into an empty memory store, so a new node skips re-embedding."""
+    if not SNAPSHOT_WARM_START_PATH or not os.path.exists(os.path.join(SNAPSHOT_WARM_START_PATH, "manifest.json")):
+        return {}
+    if vectorstore is None or vectorstore._collection.count():
+        return {}
+    return import_snapshot(SNAPSHOT_WARM_START_PATH)
+
+
+def _same_facts(text: str, other: str) -> bool:
+    """Same content words: "meeting at 3" and "meeting at 4" embed alike but state different facts."""
+    return set(tokenize(text)) == set(tokenize(other))
+
+
+def _merge_near_duplicates(items: list) -> list:
+    """Fold items that nearly repeat a stored memory, or an earlier item of the same batch, into it.
+
+    Only memories of the same user and source (user turn or BitBud reply) with the same content
+    words are merged. The kept memory gets hit_count + 1 and its last_seen/timestamp moved to now,
+    so it stays recent for retrieval and retention. Returns the items that still need to be stored.
+    """
+    if MEMORY_DEDUP_THRESHOLD <= 0 or not items:
+        return items
+
+    vectors = np.asarray(embedding_func.embed_documents([text for text, _ in items]), dtype=np.float32)
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    # Nearest stored memory of the same user and source, one query per pair in the batch
+    nearest = [None] * len(items)
+    for user_id, source in {(metadata["user_id"], metadata["source"]) for _, metadata in items}:
+        rows = [i for i, (_, metadata) in enumerate(items)
+                if metadata["user_id"] == user_id and metadata["source"] == source]
+        found = vectorstore._collection.query(
+            query_embeddings=vectors[rows].tolist(),
+            n_results=1,
+            where={"$and": [{"user_id": user_id}, {"source": source}]},
+            include=["embeddings", "metadatas", "documents"]
+        )
+        for row, ids, embeddings, metadatas, documents in zip(rows, found["ids"], found["embeddings"],
+                                                              found["metadatas"], found["documents"]):
+            if ids:
+                nearest[row] = (ids[0], np.asarray(embeddings[0], dtype=np.float32), metadatas[0], documents[0])
+
+    merged = {}  # stored id -> updated metadata
+    fresh, fresh_unit = [], []
+    for i, (text, metadata) in enumerate(items):
+        same_kind = [j for j, (_, other) in enumerate(fresh)
+                     if other["user_id"] == metadata["user_id"] and other["source"] == metadata["source"]]
+        if same_kind:
+            similarities = np.stack([fresh_unit[j] for j in same_kind]) @ unit[i]
+            j = int(np.argmax(similarities))
+            if similarities[j] >= MEMORY_DEDUP_THRESHOLD and _same_facts(text, fresh[same_kind[j]][0]):
+                fresh[same_kind[j]][1]["hit_count"] += 1
+                continue
+
+        if nearest[i] is not None:
+            doc_id, stored, stored_metadata, document = nearest[i]
+            similarity = float(stored @ unit[i]) / max(float(np.linalg.norm(stored)), 1e-12)
+            if similarity >= MEMORY_DEDUP_THRESHOLD and _same_facts(text, document or ""):
+                existing = merged.get(doc_id) or dict(stored_metadata or {})
+                existing["hit_count"] = existing.get("hit_count", 1) + 1
+                existing["last_seen"] = metadata["timestamp_epoch"]
+                existing["timestamp_epoch"] = metadata["timestamp_epoch"]
+                existing["timestamp"] = metadata["timestamp"]
+                existing["session_id"] = metadata["session_id"]
+                merged[doc_id] = existing
+                continue
+
+        metadata["hit_count"] = 1
+        metadata["last_seen"] = metadata["timestamp_epoch"]
+        fresh.append((text, metadata))
+        fresh_unit.append(unit[i])
+
+    if merged:
+        vectorstore._collection.update(ids=list(merged), metadatas=list(merged.values()))
+        print(f"[Memory] Merged {len(items) - len(fresh)} near-duplicate memories")
+    return fresh
+
+
+def _write_memories(items: list):
+    """Summarise a batch of (text, metadata) and add it to the main store in one add_texts call."""
+    items = _merge_near_duplicates(items)
+    if not items:
+        return
+
+    texts = [text for text, _ in items]
+    contexts = generate_context_summaries(texts)
+
+    metadatas = []
+    for (text, metadata), context in zip(items, contexts):
+        metadata["context"] = context
+        metadatas.append(metadata)
+
+    ids = vectorstore.add_texts(
+        texts=texts,
+        metadatas=metadatas
+    )
+
+    # Embed the summaries now so retrieval can score against them without an LLM call
+    _store_contexts([(doc_id, context) for doc_id, context in zip(ids, contexts) if context])
+    _index_memories(ids, texts, metadatas)
+
+    print(f"[Memory] Stored {len(texts)} memories in one batch")
+
+
+def _store_contexts(id_contexts: list):
+    if not id_contexts or context_store is None:
+        return
+    try:
+        context_store.add_texts(
+            texts=[context for _, context in id_contexts],
+            ids=[doc_id for doc_id, _ in id_contexts]
+        )
     except Exception as e:
-        print(f"[Memory] Cleanup failed: {e}")
+        logger.error(f"Failed to store context embeddings: {e}")
 
 
-def store_to_memory(text: str, metadata: dict = None):
+def store_to_memory(text: str, metadata: dict = None, user_id: str = None):
 
     # Skip trivial messages
     if not is_worth_storing(text):
         print(f"[Memory] Skipped storing trivial message: {text}")
         return
 
-    context = generate_context_summary(text)
-
-    # Prepare metadata with session info
+    # Prepare metadata with session info, stamped now rather than when the batch is written
     metadata = metadata or {}
-    metadata["context"] = context
     metadata["timestamp"] = datetime.now().isoformat()
-    metadata["session_id"] = _get_current_session_id()
-    metadata["source"] = "conversation"
+    metadata["timestamp_epoch"] = time.time()
+    metadata["user_id"] = user_id or DEFAULT_USER_ID
+    metadata["session_id"] = _get_current_session_id(metadata["user_id"])
+    metadata.setdefault("source", "conversation")  # BitBud replies keep their own source
 
-    vectorstore.add_texts(
-        texts=[text],
-        metadatas=[metadata]
-    )
+    get_session_buffers().get(metadata["session_id"], metadata["user_id"]).append(text, metadata["timestamp_epoch"])
 
-    print(f"[Memory] Stored: {text} with metadata: {metadata}")
+    if MEMORY_INGEST_ASYNC:
+        get_ingest_queue(_write_memories).submit(text, metadata)
+        print(f"[Memory] Queued: {text} with metadata: {metadata}")
+    else:
+        _write_memories([(text, metadata)])
 
 
-def retrieve_context(query: str, k=5, score_threshold=0.75) -> list[str]:
-    docs = vectorstore.similarity_search(query, k=k*2)
-    
+def _base_score(metadata: dict, current_session: str) -> float:
+    relevance_score = 1.0  # Base score
+
+    # Boost recent conversations
+    if metadata.get("session_id") == current_session:
+        relevance_score *= 1.5
+
+    # Boost by recency (last 24 hours get higher scores)
+    if 'timestamp' in metadata:
+        try:
+            doc_time = datetime.fromisoformat(metadata['timestamp'])
+            hours_ago = (datetime.now() - doc_time).total_seconds() / 3600
+            if hours_ago < 24:
+                relevance_score *= (1.2 - hours_ago/100)  # Recency boost
+        except:
+            pass
+
+    return relevance_score
+
+
+def _score_legacy(query: str, k: int, current_session: str, user_id: str) -> list:
+    """Original scorer: LLM summary of the query, substring match against stored contexts."""
+    docs = vectorstore.similarity_search(query, k=k*2, filter={"user_id": user_id})
     query_context = generate_context_summary(query)
-    current_session = _get_current_session_id()
 
     scored_docs = []
-    
     for doc in docs:
-        relevance_score = 1.0  # Base score
-        
-        # Boost recent conversations
-        if doc.metadata.get("session_id") == current_session:
-            relevance_score *= 1.5
-        
-        # Boost by recency (last 24 hours get higher scores)
-        if 'timestamp' in doc.metadata:
-            try:
-                doc_time = datetime.fromisoformat(doc.metadata['timestamp'])
-                hours_ago = (datetime.now() - doc_time).total_seconds() / 3600
-                if hours_ago < 24:
-                    relevance_score *= (1.2 - hours_ago/100)  # Recency boost
-            except:
-                pass
+        relevance_score = _base_score(doc.metadata, current_session)
 
         # Context matching boost
         if query_context:
@@ -205,46 +776,247 @@ def retrieve_context(query: str, k=5, score_threshold=0.75) -> list[str]:
             if any(token in context_meta for token in query_tokens):
                 relevance_score *= 1.3
 
-        scored_docs.append((doc, relevance_score))
+        scored_docs.append((doc.page_content, relevance_score))
+    return scored_docs
 
-    # Retrieve top k docs with a score above the threshold
-    scored_docs.sort(key=lambda x: x[1], reverse=True)
-    final_docs = [doc for doc, score in scored_docs[:k]]
-    
-    results = [doc.page_content for doc in final_docs]
-    print(f"[Memory] Retrieved {len(results)} relevant memories")
+
+def _context_vectors(ids: list, metadatas: list) -> dict:
+    """id -> context summary embedding; embeds and stores summaries of memories written before context_store existed."""
+    if context_store is None:
+        return {}
+
+    found = context_store._collection.get(ids=ids, include=["embeddings"])
+    vectors = {doc_id: np.asarray(vector, dtype=np.float32) for doc_id, vector in zip(found["ids"], found["embeddings"])}
+
+    missing = [(doc_id, metadata["context"]) for doc_id, metadata in zip(ids, metadatas)
+               if doc_id not in vectors and metadata and metadata.get("context")]
+    if missing:
+        _store_contexts(missing)
+        embedded = embedding_func.embed_documents([context for _, context in missing])
+        vectors.update({doc_id: np.asarray(vector, dtype=np.float32) for (doc_id, _), vector in zip(missing, embedded)})
+
+    return vectors
+
+
+def _timestamps(metadatas: list) -> np.ndarray:
+    """Epoch seconds per memory; parses the ISO timestamp of memories stored before timestamp_epoch existed."""
+    timestamps = np.full(len(metadatas), np.nan)
+    for i, metadata in enumerate(metadatas):
+        metadata = metadata or {}
+        if "timestamp_epoch" in metadata:
+            timestamps[i] = metadata["timestamp_epoch"]
+        elif "timestamp" in metadata:
+            try:
+                timestamps[i] = datetime.fromisoformat(metadata["timestamp"]).timestamp()
+            except ValueError:
+                pass
+    return timestamps
+
+
+def _retrieve_embedding(query: str, k: int, score_threshold: float, current_session: str, hot: SessionBuffer,
+                        user_id: str, query_vector=None) -> list[str]:
+    """Embed the query once, then re-rank the candidates in one vectorised pass (see agent.rerank).
+
+    Candidates are the nearest memories by vector plus the BM25 hits of the lexical index, whose
+    rankings are fused. Only memories older than the hot tier are searched, and near-duplicates
+    of hot turns are dropped.
+    """
+    if query_vector is None:
+        query_vector = embedding_func.embed_query(query)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    oldest_hot = hot.oldest_timestamp()
+    where = {"user_id": user_id}
+    if oldest_hot is not None:
+        where = {"$and": [
+            where,
+            {"$or": [{"session_id": {"$ne": current_session}}, {"timestamp_epoch": {"$lt": oldest_hot}}]}
+        ]}
+
+    found = vectorstore._collection.query(
+        query_embeddings=[query_vector.tolist()],
+        n_results=max(RETRIEVAL_FETCH_K, k),
+        where=where,
+        include=["documents", "metadatas", "embeddings"]
+    )
+    ids, documents, metadatas = found["ids"][0], found["documents"][0], found["metadatas"][0]
+    embeddings = list(found["embeddings"][0])
+
+    index = get_lexical_index()
+    lexical_ids = index.search(query, user_id, max(RETRIEVAL_FETCH_K, k)) if index is not None else []
+    known = set(ids)
+    missing = [doc_id for doc_id in lexical_ids if doc_id not in known]
+    if missing:
+        extra = vectorstore._collection.get(ids=missing, where=where, include=["documents", "metadatas", "embeddings"])
+        ids, documents, metadatas = ids + extra["ids"], documents + extra["documents"], metadatas + extra["metadatas"]
+        embeddings.extend(extra["embeddings"])
+    vectors = np.asarray(embeddings, dtype=np.float32)
+
+    if ids and len(hot):
+        unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        keep = np.flatnonzero((unit @ hot.unit_vectors(embedding_func.embed_documents).T).max(axis=1) < MEMORY_DEDUP_THRESHOLD)
+        ids, documents, metadatas = [ids[i] for i in keep], [documents[i] for i in keep], [metadatas[i] for i in keep]
+        vectors = vectors[keep]
+    if not ids:
+        return []
+
+    same_session = np.array([(metadata or {}).get("session_id") == current_session for metadata in metadatas])
+    lexical_ranks = None
+    if index is not None:
+        ranks = {doc_id: rank for rank, doc_id in enumerate(lexical_ids)}
+        lexical_ranks = np.array([ranks.get(doc_id, -1) for doc_id in ids])
+
+    # Query vs stored context summary; NaN where a memory has no summary
+    context_vectors = _context_vectors(ids, metadatas)
+    context_similarities = np.full(len(ids), np.nan)
+    rows = [i for i, doc_id in enumerate(ids) if doc_id in context_vectors]
+    if rows:
+        context_similarities[rows] = cosine_similarities(query_vector, np.stack([context_vectors[ids[i]] for i in rows]))
+
+    selected = rerank(
+        query_vector, vectors, _timestamps(metadatas), same_session, k,
+        now=time.time(),
+        score_threshold=score_threshold,
+        context_similarities=context_similarities,
+        half_life_hours=RETRIEVAL_RECENCY_HALF_LIFE_HOURS,
+        recency_weight=RETRIEVAL_RECENCY_WEIGHT,
+        session_boost=RETRIEVAL_SESSION_BOOST,
+        context_boost=RETRIEVAL_CONTEXT_BOOST,
+        mmr_lambda=RETRIEVAL_MMR_LAMBDA,
+        lexical_ranks=lexical_ranks,
+        rrf_k=RETRIEVAL_RRF_K
+    )
+    return [documents[i] for i in selected]
+
+
+def retrieve_context(query: str, k=5, score_threshold=None, scorer: str = None, user_id: str = None,
+                     query_vector=None) -> list[str]:
+    """Up to k older memories for `query`, followed by the current session's recent turns.
+
+    Recent turns come from the in-process ring buffer (hot tier); the persistent store is searched
+    with `scorer`, "embedding" or "legacy" (default: RETRIEVAL_SCORER), for anything older.
+    score_threshold is a minimum cosine similarity to the query (default: RETRIEVAL_SCORE_THRESHOLD),
+    only honoured by the embedding scorer. Only memories of `user_id` are searched.
+    A precomputed `query_vector` saves the embedding scorer from embedding the query again.
+    """
+    user_id = user_id or DEFAULT_USER_ID
+    scorer = scorer or RETRIEVAL_SCORER
+    score_threshold = RETRIEVAL_SCORE_THRESHOLD if score_threshold is None else score_threshold
+    current_session = _get_current_session_id(user_id)
+    hot = get_session_buffers().get(current_session, user_id)
+    hot_texts = [turn["text"] for turn in hot.turns()]
+
+    start = time.perf_counter()
+    if scorer == "legacy":
+        scored_docs = [(text, score) for text, score in _score_legacy(query, k, current_session, user_id) if text not in hot_texts]
+        scored_docs.sort(key=lambda x: x[1], reverse=True)
+        older = [text for text, score in scored_docs[:k]]
+    else:
+        older = _retrieve_embedding(query, k, score_threshold, current_session, hot, user_id, query_vector)
+
+    results = older + hot_texts
+    print(f"[Memory] Retrieved {len(older)} relevant memories + {len(hot_texts)} recent turns ({scorer} scorer, {(time.perf_counter() - start) * 1000:.0f} ms)")
     return results
 
-def retrieve_about_context(query: str, k=3) -> list[str]:
-    results = about_store.similarity_search(query, k=k)
+def retrieve_about_context(query: str, k=3, user_id: str = None, query_vector=None) -> list[str]:
+    # ABOUT.md describes the owner of this install, never hand it to anyone else
+    if (user_id or DEFAULT_USER_ID) != DEFAULT_USER_ID:
+        return []
+    if query_vector is not None:
+        results = about_store.similarity_search_by_vector(query_vector, k=k)
+    else:
+        results = about_store.similarity_search(query, k=k)
     return [doc.page_content for doc in results]
 
 
+# --- Multi-store retrieval
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mitchi-retrieval")
+
+
+def _timed_search(search, query_vector):
+    start = time.perf_counter()
+    texts = search(query_vector)
+    return texts, (time.perf_counter() - start) * 1000
+
+
+def search_stores(query: str, searches: dict, query_vector=None) -> dict:
+    """Embed `query` once and run every search concurrently on that vector.
+
+    `searches` maps a store name to a function query_vector -> list of texts (see `store_search`).
+    Returns {"results": {name: texts}, "texts": all texts, "timings_ms": {"embed": ms, name: ms}}.
+    A text returned by more than one store is kept only under the first of them, in `searches` order.
+    """
+    timings = {}
+    if query_vector is None:
+        start = time.perf_counter()
+        query_vector = embedding_func.embed_query(query)
+        timings["embed"] = (time.perf_counter() - start) * 1000
+
+    futures = {name: _retrieval_pool.submit(_timed_search, search, query_vector) for name, search in searches.items()}
+
+    results, seen = {}, set()
+    for name, future in futures.items():
+        try:
+            texts, timings[name] = future.result()
+        except Exception as e:
+            logger.error(f"Retrieval from {name} failed: {e}")
+            texts = []
+        results[name] = [text for text in dict.fromkeys(texts) if text not in seen]
+        seen.update(results[name])
+
+    return {
+        "results": results,
+        "texts": [text for texts in results.values() for text in texts],
+        "timings_ms": {name: round(ms, 2) for name, ms in timings.items()}
+    }
+
+
+def store_search(store, k: int):
+    """Search function for `search_stores`: top-k page contents of a LangChain-style store."""
+    return lambda query_vector: [doc.page_content for doc in store.similarity_search_by_vector(query_vector, k=k)]
+
+
+def retrieve_all_context(query: str, user_id: str = None, k=5, about_k=3) -> tuple:
+    """(memory context, about context) for one turn, from a single query embedding searched concurrently."""
+    searches = {"memory": lambda query_vector: retrieve_context(query, k=k, user_id=user_id, query_vector=query_vector)}
+    if (user_id or DEFAULT_USER_ID) == DEFAULT_USER_ID:
+        searches["about"] = store_search(about_store, about_k)
+
+    found = search_stores(query, searches)
+    timings = ", ".join(f"{name} {ms:.0f} ms" for name, ms in found["timings_ms"].items())
+    print(f"[Memory] Retrieval timings: {timings}")
+    return found["results"]["memory"], found["results"].get("about", [])
+
+
 
 # --- Main handler
-def handle_user_input(user_input: str) -> str:
+def handle_user_input(user_input: str, user_id: str = None) -> str:
 
     try:
-        # Load ABOUT.md if it changed
-        _load_about_if_changed()
-        
-        # Periodic cleanup (every 100 interactions)
-        if _last_interaction_time and datetime.now().hour == 3:  # 3 AM cleanup
-            cleanup_old_memories()
-
-        # Store user input (with filtering)
-        store_to_memory(user_input)
+        init_memory()
 
+        # Sync ABOUT.md if it changed
+        sync_about_file()
+        
         # Retrieve relevant context
-        memory_context = retrieve_context(user_input)
-        about_context = retrieve_about_context(user_input)
+        memory_context, about_context = retrieve_all_context(user_input, user_id=user_id)
+
+        # Store user input (with filtering), after retrieval so it isn't served back as its own context
+        store_to_memory(user_input, user_id=user_id)
 
         prompt = build_rag_prompt(user_input, memory_context, about_context)
 
-        reply = llm.invoke(prompt).strip()
+        if is_streaming():
+            # Forward the answer token by token to the client while it is generated
+            chunks = []
+            for chunk in llm.stream(prompt):
+                chunks.append(chunk)
+                emit_event("token", {"text": chunk})
+            reply = "".join(chunks).strip()
+        else:
+            reply = llm.invoke(prompt).strip()
 
         # Store reply (with filtering)
-        store_to_memory(reply, metadata={"source": "BitBud"})
+        store_to_memory(reply, metadata={"source": "BitBud"}, user_id=user_id)
 
         return reply
 
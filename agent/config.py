@@ -0,0 +1,151 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# --- Routing
+# "two_stage": get_plan -> get_intent (two LLM calls)
+# "single_pass": one LLM call returning the plan fields and the tool calls together
+ROUTING_MODE = os.getenv("MITCHI_ROUTING_MODE", "two_stage").strip().lower()
+
+# Deterministic rule-based pre-router that skips the LLM for unambiguous commands
+FAST_PATH_ENABLED = _env_bool("MITCHI_FAST_PATH", True)
+
+# Embedding kNN classifier over labelled utterance -> tool chain exemplars
+INTENT_CLASSIFIER_ENABLED = _env_bool("MITCHI_INTENT_CLASSIFIER", True)
+INTENT_CLASSIFIER_THRESHOLD = _env_float("MITCHI_INTENT_CLASSIFIER_THRESHOLD", 0.9)
+INTENT_CLASSIFIER_K = _env_int("MITCHI_INTENT_CLASSIFIER_K", 5)
+
+# Semantic cache of planner/router results keyed by utterance embedding
+SEMANTIC_CACHE_ENABLED = _env_bool("MITCHI_SEMANTIC_CACHE", True)
+SEMANTIC_CACHE_THRESHOLD = _env_float("MITCHI_SEMANTIC_CACHE_THRESHOLD", 0.95)
+SEMANTIC_CACHE_MAX_ENTRIES = _env_int("MITCHI_SEMANTIC_CACHE_MAX_ENTRIES", 512)
+SEMANTIC_CACHE_TTL_SECONDS = _env_float("MITCHI_SEMANTIC_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+SEMANTIC_CACHE_PATH = os.getenv("MITCHI_SEMANTIC_CACHE_PATH", "./semantic_cache")
+
+# --- LLM response cache (exact prompt match)
+LLM_CACHE_ENABLED = _env_bool("MITCHI_LLM_CACHE", True)
+LLM_CACHE_PATH = os.getenv("MITCHI_LLM_CACHE_PATH", "./llm_cache.sqlite3")
+LLM_CACHE_MEMORY_ENTRIES = _env_int("MITCHI_LLM_CACHE_MEMORY_ENTRIES", 256)
+
+# Per prompt type opt-in/opt-out and TTL in seconds (None = never expires)
+LLM_CACHE_POLICIES = {
+    "context_summary": {"enabled": True, "ttl": 30 * 24 * 3600},
+    "email_summary": {"enabled": True, "ttl": 30 * 24 * 3600},
+    "shell_command": {"enabled": True, "ttl": 24 * 3600},
+    "plan": {"enabled": False, "ttl": 24 * 3600}, # Routing is cached semantically, see SEMANTIC_CACHE_*
+    "intent": {"enabled": False, "ttl": 24 * 3600},
+    "plan_and_intent": {"enabled": False, "ttl": 24 * 3600},
+    "write_email": {"enabled": False, "ttl": None}, # Fresh draft for every email sent
+}
+
+# Comma separated prompt types to opt out of caching, e.g. MITCHI_LLM_CACHE_DISABLE=shell_command,email_summary
+for _prompt_type in filter(None, (t.strip() for t in os.getenv("MITCHI_LLM_CACHE_DISABLE", "").split(","))):
+    LLM_CACHE_POLICIES.setdefault(_prompt_type, {"ttl": None})["enabled"] = False
+
+# Schema-constrained JSON decoding (Ollama structured outputs) for planner, router and email drafting
+CONSTRAINED_JSON_ENABLED = _env_bool("MITCHI_CONSTRAINED_JSON", True)
+
+# --- ASGI serving (asgi.py)
+ASGI_MAX_IN_FLIGHT = _env_int("MITCHI_MAX_IN_FLIGHT", 4)
+ASGI_MAX_QUEUE = _env_int("MITCHI_MAX_QUEUE", 16)
+ASGI_QUEUE_TIMEOUT = _env_float("MITCHI_QUEUE_TIMEOUT", 30.0)
+ASGI_TOOL_THREADS = _env_int("MITCHI_TOOL_THREADS", 8)
+
+# --- Batch /ask
+BATCH_PARALLELISM = _env_int("MITCHI_BATCH_PARALLELISM", 4)
+BATCH_MAX_ITEMS = _env_int("MITCHI_BATCH_MAX_ITEMS", 256)
+
+# --- Memory ingestion (write-behind queue for store_to_memory)
+MEMORY_INGEST_ASYNC = _env_bool("MITCHI_MEMORY_INGEST_ASYNC", True)
+MEMORY_INGEST_QUEUE_SIZE = _env_int("MITCHI_MEMORY_INGEST_QUEUE_SIZE", 256)
+MEMORY_INGEST_BATCH_SIZE = _env_int("MITCHI_MEMORY_INGEST_BATCH_SIZE", 16)
+MEMORY_INGEST_BATCH_WAIT = _env_float("MITCHI_MEMORY_INGEST_BATCH_WAIT", 0.5)
+
+# --- Memory retrieval
+# "embedding": boost by query/context-summary cosine similarity (no LLM call per query)
+# "legacy": LLM summary of the query, substring match against stored summaries
+RETRIEVAL_SCORER = os.getenv("MITCHI_RETRIEVAL_SCORER", "embedding").strip().lower()
+
+# Embedding scorer re-ranking (agent.rerank): candidates fetched, minimum cosine similarity,
+# exponential recency decay, same-session boost, context summary boost and MMR diversity (1 = off)
+RETRIEVAL_FETCH_K = _env_int("MITCHI_RETRIEVAL_FETCH_K", 20)
+RETRIEVAL_SCORE_THRESHOLD = _env_float("MITCHI_RETRIEVAL_SCORE_THRESHOLD", 0.3)
+RETRIEVAL_RECENCY_HALF_LIFE_HOURS = _env_float("MITCHI_RETRIEVAL_RECENCY_HALF_LIFE_HOURS", 24.0)
+RETRIEVAL_RECENCY_WEIGHT = _env_float("MITCHI_RETRIEVAL_RECENCY_WEIGHT", 0.2)
+RETRIEVAL_SESSION_BOOST = _env_float("MITCHI_RETRIEVAL_SESSION_BOOST", 1.5)
+RETRIEVAL_CONTEXT_BOOST = _env_float("MITCHI_RETRIEVAL_CONTEXT_BOOST", 0.3)
+RETRIEVAL_MMR_LAMBDA = _env_float("MITCHI_RETRIEVAL_MMR_LAMBDA", 0.7)
+
+# --- Hybrid retrieval: BM25 over memory text + context summary, fused with the vector ranking (RRF)
+RETRIEVAL_LEXICAL_ENABLED = _env_bool("MITCHI_RETRIEVAL_LEXICAL", True)
+RETRIEVAL_RRF_K = _env_int("MITCHI_RETRIEVAL_RRF_K", 60)
+LEXICAL_INDEX_PATH = os.getenv("MITCHI_LEXICAL_INDEX_PATH", "./bitbud_memory/lexical.sqlite3")  # Empty = memory only
+
+# --- Embedding model (agent.embeddings): "sentence-transformers", "onnx" or "onnx-int8", all on CPU
+EMBEDDING_BACKEND = os.getenv("MITCHI_EMBEDDING_BACKEND", "sentence-transformers").strip().lower()
+EMBEDDING_MODEL_PATH = os.getenv("MITCHI_EMBEDDING_MODEL_PATH", "/home/ayush/Documents/bitbud/models/paraphrase-MiniLM-L3-v2/")
+EMBEDDING_BATCH_SIZE = _env_int("MITCHI_EMBEDDING_BATCH_SIZE", 32)
+EMBEDDING_THREADS = _env_int("MITCHI_EMBEDDING_THREADS", 0)  # 0 = runtime default
+EMBEDDING_MAX_SEQ_LENGTH = _env_int("MITCHI_EMBEDDING_MAX_SEQ_LENGTH", 128)
+EMBEDDING_ONNX_FILE = os.getenv("MITCHI_EMBEDDING_ONNX_FILE", "")  # Relative to the model path; empty = backend default
+
+# --- Embedding cache (content hash -> vector), shared by all Chroma stores and embedding routers
+EMBEDDING_CACHE_ENABLED = _env_bool("MITCHI_EMBEDDING_CACHE", True)
+EMBEDDING_CACHE_MEMORY_ENTRIES = _env_int("MITCHI_EMBEDDING_CACHE_MEMORY_ENTRIES", 4096)
+EMBEDDING_CACHE_PATH = os.getenv("MITCHI_EMBEDDING_CACHE_PATH", "./embedding_cache")  # Empty = memory only
+
+# --- ABOUT.md sync: seconds between stat checks of the file on the request path
+ABOUT_CHECK_INTERVAL = _env_float("MITCHI_ABOUT_CHECK_INTERVAL", 30.0)
+
+# --- Vector store backend for small collections (about_user)
+# "auto": exact in-process NumPy search, moved to Chroma once it exceeds NUMPY_STORE_MAX_ROWS; "chroma": always Chroma
+VECTOR_BACKEND = os.getenv("MITCHI_VECTOR_BACKEND", "auto").strip().lower()
+NUMPY_STORE_MAX_ROWS = _env_int("MITCHI_NUMPY_STORE_MAX_ROWS", 2000)
+
+# --- Memory retention, run by a background scheduler (agent.retention)
+MEMORY_RETENTION_DAYS = _env_float("MITCHI_MEMORY_RETENTION_DAYS", 45)
+MEMORY_CLEANUP_INTERVAL_HOURS = _env_float("MITCHI_MEMORY_CLEANUP_INTERVAL_HOURS", 24)
+MEMORY_CLEANUP_BATCH_SIZE = _env_int("MITCHI_MEMORY_CLEANUP_BATCH_SIZE", 500)
+
+# --- Memory consolidation
+# Near-duplicate merge at ingest (cosine similarity to the nearest stored memory, 0 disables)
+MEMORY_DEDUP_THRESHOLD = _env_float("MITCHI_MEMORY_DEDUP_THRESHOLD", 0.95)
+# Sessions older than this with at least MEMORY_DIGEST_MIN_ENTRIES memories become one digest (run with retention)
+MEMORY_DIGEST_AFTER_DAYS = _env_float("MITCHI_MEMORY_DIGEST_AFTER_DAYS", 7)
+MEMORY_DIGEST_MIN_ENTRIES = _env_int("MITCHI_MEMORY_DIGEST_MIN_ENTRIES", 4)
+
+# --- Hot memory tier: last turns of each recent session, kept in process and served without Chroma
+MEMORY_HOT_TURNS = _env_int("MITCHI_MEMORY_HOT_TURNS", 8)
+MEMORY_HOT_SESSIONS = _env_int("MITCHI_MEMORY_HOT_SESSIONS", 8)  # Per user
+
+# --- Users: memory is namespaced by the user_id of the /ask payload; requests without one
+# (and memories stored before namespaces existed) belong to the owner, DEFAULT_USER_ID
+DEFAULT_USER_ID = os.getenv("MITCHI_DEFAULT_USER_ID", "default")
+
+# --- Memory snapshots (chromaMemory.export_snapshot / import_snapshot): rows per streamed batch, and a
+# snapshot directory imported at startup when the memory store is empty (warm start of a new node)
+SNAPSHOT_BATCH_SIZE = _env_int("MITCHI_SNAPSHOT_BATCH_SIZE", 1000)
+SNAPSHOT_WARM_START_PATH = os.getenv("MITCHI_SNAPSHOT_WARM_START_PATH", "")
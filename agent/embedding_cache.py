@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingFileStore:
+    """Append-only float32 vector file read through np.memmap, plus a key per row.
+
+    Layout under `path`: vectors.f32 (rows of `dim` float32), keys.txt (one key per row)
+    and meta.json (model and dim; a different model starts a fresh store).
+    """
+
+    def __init__(self, path: str, model: str):
+        self.path = path
+        self.model = model
+        self.dim = None
+        self._rows: Dict[str, int] = {}
+        self._mmap = None
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._keys_path = os.path.join(path, "keys.txt")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != self.model:
+            print(f"[EmbeddingCache] Model changed ({meta.get('model')} -> {self.model}), starting a fresh file store")
+            for file_path in (self._vectors_path, self._keys_path, self._meta_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            return
+
+        self.dim = meta["dim"]
+        rows = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        keys = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "r", encoding="utf-8") as f:
+                keys = f.read().split()
+
+        # A crash between the two appends can leave one file a row ahead of the other (or a row
+        # half-written): cut both back to the rows they agree on, so later appends stay aligned
+        rows = min(rows, len(keys))
+        if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) != rows * 4 * self.dim:
+            os.truncate(self._vectors_path, rows * 4 * self.dim)
+        if len(keys) != rows:
+            keys = keys[:rows]
+            with open(self._keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+        for row, key in enumerate(keys):
+            self._rows[key] = row
+        print(f"[EmbeddingCache] Loaded {len(self._rows)} cached embeddings from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self._rows), self.dim))
+        return np.array(self._mmap[row])
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self._meta_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model, "dim": self.dim}, f)
+
+        new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+        if not new:
+            return
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.asarray([vector for _, vector in new], dtype=np.float32).tobytes())
+        with open(self._keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{key}\n" for key, _ in new))
+        for key, _ in new:
+            self._rows[key] = len(self._rows)
+
+
+class CachedEmbeddings:
+    """Drop-in wrapper for a LangChain embeddings object, keyed by a hash of model + text.
+
+    Lookups go to an in-memory LRU, then the optional file store; all misses of a call are
+    embedded with a single `embed_documents` call on the wrapped model.
+    """
+
+    def __init__(self, embeddings, max_memory_entries: int = 4096, persist_path: Optional[str] = None):
+        self.embeddings = embeddings
+        self.model = str(getattr(embeddings, "model_name", type(embeddings).__name__))
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = EmbeddingFileStore(persist_path, self.model) if persist_path else None
+
+        self.lookups = 0
+        self.memory_hits = 0
+        self.file_hits = 0
+        self.embedded = 0
+        self.batches = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        keys = [self.key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+
+        with self._lock:
+            self.lookups += len(texts)
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[i] = self._memory[key]
+                    self.memory_hits += 1
+                    continue
+                vector = self.store.get(key) if self.store is not None else None
+                if vector is not None:
+                    self._remember(key, vector)
+                    vectors[i] = vector
+                    self.file_hits += 1
+                else:
+                    misses.setdefault(key, []).append(i)  # Duplicates within a call are embedded once
+
+        if misses:
+            miss_keys = list(misses)
+            embedded = np.asarray(
+                self.embeddings.embed_documents([texts[misses[key][0]] for key in miss_keys]),
+                dtype=np.float32
+            )
+            with self._lock:
+                self.embedded += len(miss_keys)
+                self.batches += 1
+                for key, vector in zip(miss_keys, embedded):
+                    self._remember(key, vector)
+                    for i in misses[key]:
+                        vectors[i] = vector
+                if self.store is not None:
+                    try:
+                        self.store.put_many(miss_keys, embedded)
+                    except OSError as e:
+                        logger.error(f"Failed to persist embeddings: {e}")
+
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self._embed(list(texts))]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.file_hits
+            return {
+                "model": self.model,
+                "memory_entries": len(self._memory),
+                "file_entries": len(self.store) if self.store is not None else 0,
+                "lookups": self.lookups,
+                "memory_hits": self.memory_hits,
+                "file_hits": self.file_hits,
+                "embedded": self.embedded,
+                "batches": self.batches,
+                "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0
+            }
+
+
+_cache: Optional[CachedEmbeddings] = None
+
+
+def wrap_embeddings(embeddings) -> CachedEmbeddings:
+    """Wrap the memory embedding model with the shared cache configured in agent.config."""
+    global _cache
+    from agent.config import EMBEDDING_CACHE_MEMORY_ENTRIES, EMBEDDING_CACHE_PATH
+
+    _cache = CachedEmbeddings(
+        embeddings,
+        max_memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES,
+        persist_path=EMBEDDING_CACHE_PATH or None
+    )
+    return _cache
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    if _cache is None:
+        return {"lookups": 0, "memory_hits": 0, "file_hits": 0, "embedded": 0, "hit_rate": 0.0}
+    return _cache.stats()
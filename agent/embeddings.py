@@ -0,0 +1,175 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend:
+    """LangChain-compatible embeddings (embed_documents / embed_query) over a local model on CPU.
+
+    Texts are embedded `batch_size` at a time, sorted by length so each batch pads to similar lengths.
+    `threads` = 0 leaves the runtime's default thread count. `model_name` identifies the model and
+    backend to the embedding cache and to snapshots.
+    """
+
+    backend = ""
+
+    def __init__(self, model_path: str, batch_size: int = 32, threads: int = 0, max_seq_length: int = 128):
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        self.threads = threads
+        self.max_seq_length = max_seq_length
+
+    @property
+    def model_name(self) -> str:
+        return f"{self.model_path}|{self.backend}"
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """PyTorch sentence-transformers, the same model code HuggingFaceEmbeddings wraps."""
+
+    backend = "sentence-transformers"
+
+    def __init__(self, model_path: str, **kwargs):
+        super().__init__(model_path, **kwargs)
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.model.max_seq_length = self.max_seq_length
+
+    @property
+    def model_name(self) -> str:
+        # Vectors are identical to the former HuggingFaceEmbeddings ones, keep their cache key
+        return self.model_path
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime inference of the exported transformer, with the sentence-transformers pooling.
+
+    Expects `tokenizer.json` in the model directory and the ONNX graph at `onnx_file` (relative to it),
+    as written by `optimum-cli export onnx --model <model_path> --task feature-extraction <model_path>/onnx`.
+    """
+
+    backend = "onnx"
+    default_onnx_file = "onnx/model.onnx"
+
+    def __init__(self, model_path: str, onnx_file: Optional[str] = None, **kwargs):
+        super().__init__(model_path, **kwargs)
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_file = os.path.join(model_path, onnx_file or self.default_onnx_file)
+        self._prepare_model(model_file)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = onnxruntime.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        pad_token = "[PAD]" if self.tokenizer.token_to_id("[PAD]") is not None else "<pad>"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+        self.pooling = self._pooling_mode(model_path)
+
+    def _prepare_model(self, model_file: str):
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(
+                f"{model_file} not found, export it with: optimum-cli export onnx --model {self.model_path} "
+                f"--task feature-extraction {os.path.join(self.model_path, 'onnx')}"
+            )
+
+    @staticmethod
+    def _pooling_mode(model_path: str) -> str:
+        config_path = os.path.join(model_path, "1_Pooling", "config.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                if json.load(f).get("pooling_mode_cls_token"):
+                    return "cls"
+        return "mean"
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: value for name, value in inputs.items() if name in self._input_names})[0]
+
+        if self.pooling == "cls":
+            return hidden[:, 0].astype(np.float32)
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        return ((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+
+class OnnxInt8Backend(OnnxBackend):
+    """OnnxBackend on a dynamically int8-quantised graph; quantised from onnx/model.onnx on first use."""
+
+    backend = "onnx-int8"
+    default_onnx_file = "onnx/model_qint8.onnx"
+
+    def _prepare_model(self, model_file: str):
+        if os.path.exists(model_file):
+            return
+        source = os.path.join(self.model_path, OnnxBackend.default_onnx_file)
+        super()._prepare_model(source)
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(source, model_file, weight_type=QuantType.QInt8)
+        print(f"[Embeddings] Quantised {source} to int8: {model_file}")
+
+
+EMBEDDING_BACKENDS = {
+    SentenceTransformerBackend.backend: SentenceTransformerBackend,
+    OnnxBackend.backend: OnnxBackend,
+    OnnxInt8Backend.backend: OnnxInt8Backend
+}
+
+
+def create_embeddings(backend: Optional[str] = None, model_path: Optional[str] = None) -> EmbeddingBackend:
+    """Embedding backend configured in agent.config (EMBEDDING_*), optionally overriding backend and model."""
+    from agent.config import (EMBEDDING_BACKEND, EMBEDDING_MODEL_PATH, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS,
+                              EMBEDDING_MAX_SEQ_LENGTH, EMBEDDING_ONNX_FILE)
+
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {sorted(EMBEDDING_BACKENDS)}")
+
+    kwargs = {
+        "batch_size": EMBEDDING_BATCH_SIZE,
+        "threads": EMBEDDING_THREADS,
+        "max_seq_length": EMBEDDING_MAX_SEQ_LENGTH
+    }
+    if backend != SentenceTransformerBackend.backend and EMBEDDING_ONNX_FILE:
+        kwargs["onnx_file"] = EMBEDDING_ONNX_FILE
+    return EMBEDDING_BACKENDS[backend](model_path or EMBEDDING_MODEL_PATH, **kwargs)
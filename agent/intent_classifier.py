@@ -0,0 +1,280 @@
+import os
+import re
+import json
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT_PATH = "agent/prompts/system_prompt.txt"
+EXEMPLARS_FILE = "intent_exemplars.jsonl"
+
+# Arguments that select *what* a tool does rather than carrying text from the utterance
+ENUM_ARGS = {"type", "action"}
+
+# Routings that must always be confirmed by the LLM router, however close the neighbour is
+NEVER_AUTO_ROUTE = {
+    ("system_control", "immediate_action"),
+    ("system_control", "kill_process"),
+    ("email_manager", "send_email"),
+    ("linux_commands", None),
+}
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+# Words that move a time by 12 hours without appearing in any argument: "6:30 am" and "6:30 pm" are both hour 6
+_DAY_PERIOD = re.compile(r"(?<=\d)\s*([ap])\.?m\b\.?|(?<!\w)(noon|midnight|morning|afternoon|evening|tonight|night)(?!\w)")
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and re.fullmatch(r"\s*\d+(?:\.\d+)?\s*", value):
+        return float(value)
+    return None
+
+
+def _value_in_text(value: Any, text: str) -> bool:
+    """`value` occurs in `text` as whole tokens: PID 1234 is not in "pid 12345", hour 6 not in "16:30"."""
+    number = _as_number(value)
+    if number is not None:
+        return any(float(token) == number for token in _NUMBER.findall(text))
+    return re.search(rf"(?<!\w){re.escape(_normalize_text(str(value)))}(?!\w)", text) is not None
+
+
+def _day_periods(text: str) -> set:
+    return {(meridiem + "m") if meridiem else word for meridiem, word in _DAY_PERIOD.findall(_normalize_text(text))}
+
+
+def chain_is_grounded(tool_chain: List[Dict[str, Any]], utterance: str, source_utterance: str) -> bool:
+    """True when the chain, routed for `source_utterance`, also fits `utterance`: every text-derived
+    argument appears in it as whole tokens, and both name the same am/pm or time of day."""
+    if _day_periods(utterance) != _day_periods(source_utterance):
+        return False
+    text = _normalize_text(utterance)
+    for call in tool_chain:
+        for name, value in (call.get("args") or {}).items():
+            if name in ENUM_ARGS or name == "user_input" or value in (None, "", [], {}):
+                continue
+            if not _value_in_text(value, text):
+                return False
+    return True
+
+
+def chain_signature(tool_chain: List[Dict[str, Any]]) -> Tuple:
+    """The routing decision of a chain without its free-text arguments, e.g. (("clock", "get_time", None),)."""
+    return tuple(
+        (call.get("function"), (call.get("args") or {}).get("type"), (call.get("args") or {}).get("action"))
+        for call in tool_chain
+    )
+
+
+def is_auto_routable(signature: Tuple) -> bool:
+    for function, cmd_type, _ in signature:
+        if (function, cmd_type) in NEVER_AUTO_ROUTE or (function, None) in NEVER_AUTO_ROUTE:
+            return False
+    return True
+
+
+def load_prompt_exemplars(file_path: str = SYSTEM_PROMPT_PATH) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Parse the "### EXAMPLES ###" section of the router prompt into (utterance, tool chain) pairs."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        prompt = f.read()
+
+    start = prompt.find("### EXAMPLES ###")
+    end = prompt.find("### OUTPUT FORMAT ###")
+    if start == -1:
+        return []
+    section = prompt[start + len("### EXAMPLES ###"):end if end != -1 else None]
+
+    exemplars = []
+    for block in re.split(r"\n\s*\d+\.\s+User:", "\n" + section)[1:]:
+        block = block.strip()
+        utterances, sep, raw_chain = block.partition("→")
+        if not sep:
+            utterances, _, raw_chain = block.partition("\n")
+
+        # The prompt examples are written for humans, patch up the usual slips before parsing
+        raw_chain = re.sub(r'(?<=[{,\s])args":', ' "args":', raw_chain.strip())
+        raw_chain = raw_chain.replace("''", '""')
+        raw_chain = re.sub(r"\}\s*\n(\s*)\{", "},\n\\1{", raw_chain)
+
+        try:
+            tool_chain = json.loads(raw_chain)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping unparsable prompt example: {utterances.strip()}")
+            continue
+        if isinstance(tool_chain, dict):
+            tool_chain = [tool_chain]
+
+        for utterance in utterances.split(" / "):
+            utterance = utterance.strip()
+            if utterance and "<" not in utterance:
+                exemplars.append((utterance, tool_chain))
+
+    return exemplars
+
+
+class IntentClassifier:
+    """Nearest-neighbour router over labelled utterance -> tool chain exemplars.
+
+    Exemplar embeddings are kept as one normalized float32 matrix, so a lookup is a single
+    matrix-vector product.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.9, k: int = 5, min_margin: float = 0.05,
+                 exemplars_file: Optional[str] = EXEMPLARS_FILE):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.k = k
+        self.min_margin = min_margin
+        self.exemplars_file = exemplars_file
+
+        self._lock = threading.Lock()
+        self._utterances: List[str] = []
+        self._chains: List[List[Dict[str, Any]]] = []
+        self._signatures: List[Tuple] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._stats = Counter()
+
+    @staticmethod
+    def _normalize_rows(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def load(self, exemplars: List[Tuple[str, List[Dict[str, Any]]]]):
+        """Seed the classifier with exemplars plus any previously confirmed routings on disk."""
+        exemplars = list(exemplars)
+        if self.exemplars_file and os.path.exists(self.exemplars_file):
+            with open(self.exemplars_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        exemplars.append((record["utterance"], record["tool_chain"]))
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+        self._add(exemplars)
+        logger.info(f"Intent classifier loaded {len(self._utterances)} exemplars")
+
+    def _add(self, exemplars: List[Tuple[str, List[Dict[str, Any]]]]):
+        if not exemplars:
+            return
+        vectors = self._normalize_rows(self.embeddings.embed_documents([u.lower() for u, _ in exemplars]))
+        with self._lock:
+            self._matrix = vectors if not self._utterances else np.vstack([self._matrix, vectors])
+            for utterance, tool_chain in exemplars:
+                self._utterances.append(utterance)
+                self._chains.append(tool_chain)
+                self._signatures.append(chain_signature(tool_chain))
+
+    def add_exemplar(self, utterance: str, tool_chain: List[Dict[str, Any]], persist: bool = True):
+        """Add a confirmed routing so similar utterances skip the LLM next time."""
+        tool_chain = [
+            {"function": call.get("function"),
+             "args": {k: v for k, v in (call.get("args") or {}).items() if k != "user_input"}}
+            for call in tool_chain
+        ]
+        self._add([(utterance, tool_chain)])
+
+        if persist and self.exemplars_file:
+            with open(self.exemplars_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"utterance": utterance, "tool_chain": tool_chain}) + "\n")
+
+    def classify(self, utterance: str) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """Return (tool chain, confidence) when the neighbourhood agrees confidently, else None."""
+        query = self._normalize_rows(self.embeddings.embed_query(utterance.lower()))[0]
+
+        with self._lock:
+            if not self._utterances:
+                return None
+            sims = self._matrix @ query
+            k = min(self.k, len(sims))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            signatures = [self._signatures[i] for i in top]
+            chains = [self._chains[i] for i in top]
+            sources = [self._utterances[i] for i in top]
+
+        top_sims = sims[top]
+        best = signatures[0]
+        confidence = float(top_sims[0])
+        # Distance to the closest neighbour that would route differently
+        runner_up = next((float(sim) for sim, s in zip(top_sims, signatures) if s != best), 0.0)
+        margin = confidence - runner_up
+
+        result = None
+        if confidence >= self.threshold and margin >= self.min_margin and is_auto_routable(best):
+            # Reuse the closest exemplar of the winning label whose arguments all come from this utterance
+            for signature, tool_chain, source in zip(signatures, chains, sources):
+                if signature == best and chain_is_grounded(tool_chain, utterance, source):
+                    result = (json.loads(json.dumps(tool_chain)), confidence)
+                    break
+
+        with self._lock:
+            self._stats["total"] += 1
+            self._stats["hits" if result else "misses"] += 1
+
+        logger.info(f"Intent classifier: best={best} confidence={confidence:.3f} margin={margin:.3f} hit={bool(result)}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["total"]
+            return {
+                "exemplars": len(self._utterances),
+                "total": total,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": round(self._stats["hits"] / total, 4) if total else 0.0,
+            }
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Lazily build the shared classifier from the memory embedding model and the router prompt examples."""
+    global _classifier
+
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                from agent.chromaMemory import get_embedding_func
+                from agent.config import INTENT_CLASSIFIER_THRESHOLD, INTENT_CLASSIFIER_K
+
+                embedding_func = get_embedding_func()
+                if embedding_func is None:
+                    logger.warning("Embedding function unavailable, intent classifier disabled")
+                    return None
+
+                classifier = IntentClassifier(embedding_func, threshold=INTENT_CLASSIFIER_THRESHOLD, k=INTENT_CLASSIFIER_K)
+                classifier.load(load_prompt_exemplars())
+                _classifier = classifier
+
+    return _classifier
+
+
+def add_exemplar(utterance: str, tool_chain: List[Dict[str, Any]]):
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        classifier.add_exemplar(utterance, tool_chain)
+
+
+def get_intent_classifier_stats() -> Dict[str, Any]:
+    if _classifier is None:
+        return {"exemplars": 0, "total": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+    return _classifier.stats()
@@ -0,0 +1,192 @@
+import re
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rule/grammar based pre-router. Every rule must match the *whole* (normalized) utterance,
+# so anything with extra intent ("... and then ...") falls through to the LLM planner.
+
+_FILLER_PREFIX = re.compile(r"^(?:(?:hey|hi|ok|okay)\s+)?(?:mitchi[\s,]+)?(?:(?:can|could|would) you\s+)?(?:please\s+)?")
+_FILLER_SUFFIX = re.compile(r"(?:\s+(?:please|for me|now|mitchi))+$")
+
+_APP_NAMES = {
+    "spotify": "spotify",
+    "vscode": "vscode",
+    "vs code": "vscode",
+    "youtube": "youtube",
+    "netflix": "netflix",
+    "chatgpt": "chatgpt",
+    "linkedin": "linkedin",
+    "github": "github",
+    "chrome": "chrome",
+    "terminal": "terminal",
+}
+
+_SECONDS_PER_UNIT = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600}
+
+_UNIT = r"(?P<unit>second|sec|minute|min|hour|hr)s?"
+_PERCENT = r"(?:\s?(?:%|percent))?"
+
+
+def normalize_utterance(text: str) -> str:
+    text = text.lower().strip()
+    text = re.sub(r"[?!.]+$", "", text).strip()
+    text = re.sub(r"\s+", " ", text)
+    text = text.replace("what's", "what is")
+    text = _FILLER_PREFIX.sub("", text)
+    text = _FILLER_SUFFIX.sub("", text)
+    return text.strip(" ,")
+
+
+def _call(function: str, **args) -> List[Dict[str, Any]]:
+    return [{"function": function, "args": args}]
+
+
+def _timer(m: re.Match) -> List[Dict[str, Any]]:
+    seconds = int(m.group("amount")) * _SECONDS_PER_UNIT[m.group("unit")]
+    return _call("clock", type="timer", seconds=seconds, objective="")
+
+
+def _alarm(m: re.Match) -> Optional[List[Dict[str, Any]]]:
+    hour = int(m.group("hour"))
+    minute = int(m.group("minute") or 0)
+    meridiem = m.group("meridiem")
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        if meridiem == "pm" and hour < 12:
+            hour += 12
+        elif meridiem == "am" and hour == 12:
+            hour = 0
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return _call("clock", type="alarm", hour=hour, minute=minute, objective="")
+
+
+def _volume(action: str) -> Callable[[re.Match], List[Dict[str, Any]]]:
+    def build(m: re.Match) -> List[Dict[str, Any]]:
+        value = m.groupdict().get("value")
+        if value is None:
+            return _call("system_control", type="volume", action=action)
+        return _call("system_control", type="volume", action=action, value=int(value))
+    return build
+
+
+def _open_app(m: re.Match) -> List[Dict[str, Any]]:
+    return _call("open_app", name=_APP_NAMES[m.group("app")], query="")
+
+
+# (rule name, pattern, builder) -- a builder may return None to reject a match
+FAST_PATH_RULES: List[Tuple[str, re.Pattern, Callable[[re.Match], Optional[List[Dict[str, Any]]]]]] = [
+    # --- clock
+    ("clock.get_time",
+     re.compile(r"what time is it|what is the (?:current )?time|(?:tell|give) me the (?:current )?time|(?:the )?current time"),
+     lambda m: _call("clock", type="get_time")),
+    ("clock.get_active_alarms",
+     re.compile(r"(?:list|show|get)(?: me)?(?: all)?(?: my| the)?(?: active)? alarms|what alarms do i have"),
+     lambda m: _call("clock", type="get_active_alarms")),
+    ("clock.get_active_timers",
+     re.compile(r"(?:list|show|get)(?: me)?(?: all)?(?: my| the)?(?: active)? timers|what timers do i have"),
+     lambda m: _call("clock", type="get_active_timers")),
+    ("clock.clear_alarms",
+     re.compile(r"(?:clear|delete|remove|cancel)(?: all)?(?: my| the)? alarms"),
+     lambda m: _call("clock", type="clear_alarms")),
+    ("clock.clear_timers",
+     re.compile(r"(?:clear|delete|remove|cancel)(?: all)?(?: my| the)? timers"),
+     lambda m: _call("clock", type="clear_timers")),
+    ("clock.timer",
+     re.compile(rf"(?:set|start)(?: a| an)? timer for (?P<amount>\d+) {_UNIT}"),
+     _timer),
+    ("clock.timer",
+     re.compile(rf"(?:set|start)(?: a| an)? (?P<amount>\d+)[ -]{_UNIT} timer"),
+     _timer),
+    ("clock.alarm",
+     re.compile(r"set(?: an| the)? alarm (?:for|at) (?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s?(?P<meridiem>am|pm)?"),
+     _alarm),
+
+    # --- system_control
+    ("system_control.volume_get",
+     re.compile(r"what is the (?:current )?volume|(?:get|show)(?: me)? the (?:current )?volume|current volume"),
+     _volume("get")),
+    ("system_control.volume_set",
+     re.compile(rf"set(?: the)? volume to (?P<value>\d{{1,3}}){_PERCENT}"),
+     _volume("set")),
+    ("system_control.volume_up",
+     re.compile(rf"(?:increase|raise|turn up)(?: the)? volume(?: by (?P<value>\d{{1,3}}){_PERCENT})?"),
+     _volume("up")),
+    ("system_control.volume_down",
+     re.compile(rf"(?:decrease|lower|reduce|turn down)(?: the)? volume(?: by (?P<value>\d{{1,3}}){_PERCENT})?"),
+     _volume("down")),
+    ("system_control.volume_mute",
+     re.compile(r"mute(?: the)?(?: volume| sound| audio)?"),
+     _volume("mute")),
+    ("system_control.volume_unmute",
+     re.compile(r"unmute(?: the)?(?: volume| sound| audio)?"),
+     _volume("unmute")),
+    ("system_control.processes",
+     re.compile(r"(?:list|show)(?: me)?(?: all)?(?: the)?(?: running)? processes"),
+     lambda m: _call("system_control", type="processes")),
+    ("system_control.get_system_info",
+     re.compile(r"(?:get|show)(?: me)?(?: the)?(?: my)? system info(?:rmation)?|system info(?:rmation)?"),
+     lambda m: _call("system_control", type="get_system_info")),
+    ("system_control.get_system_temperature",
+     re.compile(r"what is the (?:system|cpu) temperature|(?:get|show)(?: me)? the (?:system|cpu) temperature|(?:system|cpu) temperature"),
+     lambda m: _call("system_control", type="get_system_temperature")),
+
+    # --- open_app (bare app launches only; searches inside apps go through the planner)
+    ("open_app",
+     re.compile(r"(?:open|launch|start)(?: the)? (?P<app>" + "|".join(sorted(_APP_NAMES, key=len, reverse=True)) + r")(?: app)?"),
+     _open_app),
+]
+
+
+_stats_lock = threading.Lock()
+_rule_hits = Counter()
+_stats = Counter()
+
+
+def match_fast_path(user_input: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Return (rule name, tool chain) when exactly one rule matches the whole utterance, else None."""
+    text = normalize_utterance(user_input)
+
+    matches = []
+    for name, pattern, build in FAST_PATH_RULES:
+        m = pattern.fullmatch(text)
+        if not m:
+            continue
+        tool_chain = build(m)
+        if tool_chain:
+            matches.append((name, tool_chain))
+
+    with _stats_lock:
+        _stats["total"] += 1
+        if len(matches) == 1:
+            _stats["hits"] += 1
+            _rule_hits[matches[0][0]] += 1
+        elif matches:
+            _stats["ambiguous"] += 1
+        else:
+            _stats["misses"] += 1
+
+    if len(matches) == 1:
+        return matches[0]
+
+    if matches:
+        logger.info(f"Fast path ambiguous for '{text}': {[name for name, _ in matches]}")
+    return None
+
+
+def get_fast_path_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        total = _stats["total"]
+        return {
+            "total": total,
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "ambiguous": _stats["ambiguous"],
+            "hit_rate": round(_stats["hits"] / total, 4) if total else 0.0,
+            "rules": dict(_rule_hits),
+        }
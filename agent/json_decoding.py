@@ -0,0 +1,220 @@
+import re
+import json
+import hashlib
+import logging
+import threading
+import requests
+from collections import Counter
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TOOL_NAMES = [
+    "open_app", "recommend_music", "search_web", "linux_commands", "clock",
+    "system_control", "scraper_tool", "email_manager", "fallback"
+]
+
+# --- Per-function output schemas (passed to Ollama's `format`)
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "clarify": {"type": ["string", "null"]},
+        "reasoning": {"type": "string"},
+        "steps": {"type": "array", "items": {"type": "string"}},
+        "final_instruction": {"type": "string"}
+    },
+    "required": ["clarify", "reasoning", "steps", "final_instruction"]
+}
+
+TOOL_CALL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "function": {"type": "string", "enum": TOOL_NAMES},
+        "args": {"type": "object"}
+    },
+    "required": ["function", "args"]
+}
+
+INTENT_SCHEMA = {
+    "type": "array",
+    "items": TOOL_CALL_SCHEMA,
+    "minItems": 1
+}
+
+PLAN_AND_INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **PLAN_SCHEMA["properties"],
+        "tool_calls": INTENT_SCHEMA
+    },
+    "required": PLAN_SCHEMA["required"] + ["tool_calls"]
+}
+
+EMAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subject": {"type": "string"},
+        "body": {"type": "string"},
+        "recipient": {"type": "string"}
+    },
+    "required": ["subject", "body", "recipient"]
+}
+
+CONTEXT_SUMMARIES_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string"}
+}
+
+
+class IncrementalJSONParser:
+    """Tracks the first top-level JSON value in a stream of text chunks.
+
+    `feed` returns True as soon as the value's closing bracket arrives, so a generation can be
+    stopped right there. Leading prose or markdown fences before the value are ignored.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._start = None
+        self._end = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+        self._text += chunk
+
+        while self._pos < len(self._text):
+            ch = self._text[self._pos]
+            self._pos += 1
+
+            if self._start is None:
+                if ch in "{[":
+                    self._start = self._pos - 1
+                    self._stack.append(ch)
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._end = self._pos
+                    return True
+
+        return False
+
+    def text(self) -> str:
+        """The JSON value seen so far (complete or not), or the raw text if none started."""
+        if self._start is None:
+            return self._text
+        return self._text[self._start:self._end]
+
+    def result(self) -> Any:
+        """Parse the value, repairing a truncated tail (open strings/brackets, trailing commas)."""
+        if self._start is None:
+            raise ValueError("No JSON value found in model output")
+
+        fragment = self.text()
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            pass
+
+        if not self.complete:
+            if self._in_string:
+                fragment += '"'
+            fragment = re.sub(r'[,:]\s*$', "", fragment.rstrip())
+            if self._stack and self._stack[-1] == "{":
+                fragment = re.sub(r'([{,])\s*"[^"]*"\s*$', r"\1", fragment)  # dangling key without a value
+                fragment = re.sub(r',\s*$', "", fragment)
+            fragment += "".join("}" if opener == "{" else "]" for opener in reversed(self._stack))
+
+        fragment = re.sub(r",\s*([}\]])", r"\1", fragment)
+        return json.loads(fragment)
+
+
+def parse_json_tolerant(text: str) -> Any:
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
+
+
+class OllamaJSONGenerator:
+    """LLM-like object whose `invoke` runs a schema-constrained Ollama generation.
+
+    The response is streamed through an IncrementalJSONParser and the request is closed as soon
+    as the top-level value is complete, which stops the generation server-side.
+    Needs an Ollama server with structured outputs (JSON schema in `format`).
+    """
+
+    def __init__(self, model: str, schema: Dict[str, Any], base_url: str = "http://localhost:11434",
+                 options: Optional[Dict[str, Any]] = None, timeout: float = 300):
+        self.model = model
+        self.schema = schema
+        self.base_url = base_url.rstrip("/")
+        self.options = options or {}
+        self.timeout = timeout
+        # Part of the LLM response cache key, so different schemas never share entries
+        self.format = "schema:" + hashlib.sha1(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:12]
+
+    def invoke(self, prompt: str) -> str:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "format": self.schema,
+            "stream": True,
+            "options": self.options
+        }
+        parser = IncrementalJSONParser()
+
+        with requests.post(f"{self.base_url}/api/generate", json=payload, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                if parser.feed(data.get("response", "")) or data.get("done"):
+                    break
+
+        return parser.text()
+
+
+# --- Parse failure metric, split by decoding mode so before/after can be compared
+_parse_lock = threading.Lock()
+_parse_stats: Dict[str, Counter] = {}
+
+
+def record_json_parse(function: str, mode: str, ok: bool):
+    with _parse_lock:
+        _parse_stats.setdefault(f"{function}:{mode}", Counter())["ok" if ok else "failed"] += 1
+
+
+def get_json_parse_stats() -> Dict[str, Any]:
+    with _parse_lock:
+        stats = {}
+        for key, counter in _parse_stats.items():
+            total = counter["ok"] + counter["failed"]
+            stats[key] = {
+                "ok": counter["ok"],
+                "failed": counter["failed"],
+                "failure_rate": round(counter["failed"] / total, 4) if total else 0.0
+            }
+        return stats
@@ -1,17 +1,14 @@
 import urllib.parse
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from agent.chromaMemory import handle_user_input 
 from typing import TypedDict, Dict, Any, List
-from agent.llm import get_intent, get_plan
-from agent.tools.clock import clock
-from agent.tools.search import search_web
-from agent.tools.app_launcher import open_app
-from agent.tools.recommend import recommend_music
-from agent.tools.shell_command import linux_commands
-from agent.tools.system_control import system_control
-from agent.tools.scraper import scraper_tool  # NEW
-from agent.gmail_tool.gmail_service import email_manager  # NEW
+from agent.llm import get_intent, get_plan, get_plan_and_intent
+from agent.config import ROUTING_MODE, FAST_PATH_ENABLED, INTENT_CLASSIFIER_ENABLED, SEMANTIC_CACHE_ENABLED
+from agent.intent_rules import match_fast_path
+from agent.intent_classifier import get_intent_classifier
+from agent.semantic_cache import get_semantic_cache
+from agent.streaming import emit_event
+from agent.startup import LazyHandlers, is_ready
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +26,7 @@ class BitBudState(TypedDict, total=False):
     reasoning: str # --- NEW
     steps: List[str] # --- NEW
     final_instruction: str # --- NEW
+    user_id: str # Memory namespace of the caller, from the /ask payload
 
 
 def fallback(args: Dict[str, Any] = None) -> str:
@@ -38,21 +36,36 @@ def fallback(args: Dict[str, Any] = None) -> str:
     logger.info(f"user_input_fallback: {user_input}")
     
     if user_input:
-        return handle_user_input(user_input)
+        from agent.chromaMemory import handle_user_input
+        return handle_user_input(user_input, user_id=args.get("user_id"))
     return "I'm not sure how to help with that."
 
 
-FUNCTION_HANDLERS = {
-    "open_app": open_app,
-    "recommend_music": recommend_music,
-    "search_web": search_web,
-    "linux_commands": linux_commands,
-    "clock": clock,
-    "system_control": system_control,
-    "scraper_tool": scraper_tool,  # NEW
-    "email_manager": email_manager,  # NEW
+# Tool modules are imported on first use (see LazyHandlers)
+FUNCTION_HANDLERS = LazyHandlers({
+    "open_app": "agent.tools.app_launcher:open_app",
+    "recommend_music": "agent.tools.recommend:recommend_music",
+    "search_web": "agent.tools.search:search_web",
+    "linux_commands": "agent.tools.shell_command:linux_commands",
+    "clock": "agent.tools.clock:clock",
+    "system_control": "agent.tools.system_control:system_control",
+    "scraper_tool": "agent.tools.scraper:scraper_tool",  # NEW
+    "email_manager": "agent.gmail_tool.gmail_service:email_manager",  # NEW
     "fallback": fallback
-}
+})
+
+
+def validate_tool_chain(tool_chain: Any) -> List[Dict[str, Any]]:
+    """A client-supplied tool chain (POST /intent/exemplars), ValueError unless every call is
+    {"function": <known handler>, "args": {...}}."""
+    if not isinstance(tool_chain, list) or not tool_chain:
+        raise ValueError("tool_chain must be a non-empty list")
+    for call in tool_chain:
+        if not isinstance(call, dict) or not isinstance(call.get("function"), str) or call["function"] not in FUNCTION_HANDLERS:
+            raise ValueError(f"Each tool_chain item needs a function, one of {sorted(FUNCTION_HANDLERS)}")
+        if not isinstance(call.get("args", {}), dict):
+            raise ValueError("tool_chain args must be an object")
+    return tool_chain
 
 
 def parse_args(args):
@@ -71,6 +84,97 @@ def normalize_intent_result(result: Any) -> List[Dict[str, Any]]:
         return [result]
     return []
 
+# --- Deterministic pre-router, skips the LLM planner/router for unambiguous commands
+def fast_path_route(state: BitBudState) -> Dict[str, Any]:
+    user_input = state["input"]
+
+    match = match_fast_path(user_input)
+    if not match:
+        return {}
+
+    rule, tool_chain = match
+    logger.info(f"Fast path rule '{rule}' matched: {tool_chain}")
+
+    return build_routed_state(user_input, tool_chain, None, f"Fast path: {rule}", [], user_input)
+
+
+# --- Semantic cache of earlier planner/router results
+def semantic_cache_route(state: BitBudState) -> Dict[str, Any]:
+    user_input = state["input"]
+
+    if not is_ready():
+        return {}  # Embedding model still loading, don't block the request on it
+
+    try:
+        cache = get_semantic_cache()
+        cached = cache.get(user_input) if cache else None
+    except Exception as e:
+        logger.error(f"Semantic cache lookup failed, falling back to LLM planner: {e}")
+        cached = None
+
+    if not cached:
+        return {}
+
+    plan = cached["plan"]
+    logger.info(f"Semantic cache hit (similarity {cached['similarity']:.3f}): {cached['tool_chain']}")
+
+    return build_routed_state(
+        user_input,
+        cached["tool_chain"],
+        plan.get("clarify"),
+        plan.get("reasoning", ""),
+        plan.get("steps", []),
+        plan.get("final_instruction", user_input)
+    )
+
+
+def remember_routing(user_input: str, routed_state: Dict[str, Any]):
+    """Store a fresh LLM planner/router result in the semantic cache, unless parsing failed."""
+    if not SEMANTIC_CACHE_ENABLED or not is_ready():
+        return
+
+    reasoning = routed_state.get("reasoning") or ""
+    tool_chain = routed_state.get("tool_chain", [])
+    if reasoning.startswith(("Fallback:", "No plan generated")) or any("error" in call for call in tool_chain):
+        return
+
+    try:
+        cache = get_semantic_cache()
+        if cache:
+            cache.put(user_input, routed_state, tool_chain)
+    except Exception as e:
+        logger.error(f"Failed to store routing in semantic cache: {e}")
+
+
+# --- Embedding nearest-neighbour router over labelled exemplars
+def classify_intent_route(state: BitBudState) -> Dict[str, Any]:
+    user_input = state["input"]
+
+    if not is_ready():
+        return {}
+
+    try:
+        classifier = get_intent_classifier()
+        match = classifier.classify(user_input) if classifier else None
+    except Exception as e:
+        logger.error(f"Intent classifier failed, falling back to LLM planner: {e}")
+        match = None
+
+    if not match:
+        return {}
+
+    tool_chain, confidence = match
+    logger.info(f"Intent classifier matched with confidence {confidence:.3f}: {tool_chain}")
+
+    return build_routed_state(user_input, tool_chain, None, f"Intent classifier: confidence {confidence:.3f}", [], user_input)
+
+
+def decide_after_pre_route(state: BitBudState) -> str:
+    """Execute right away when a pre-router filled in the tool chain, else hand over to the LLM planner."""
+    if state.get("tool_chain"):
+        return decide_execution_path(state)
+    return "fall_through"
+
 # --- CoT Planner  # --- NEW
 def create_plan(state: BitBudState) -> Dict[str, Any]:
     user_input = state["input"]
@@ -94,7 +198,10 @@ def create_plan(state: BitBudState) -> Dict[str, Any]:
 # --- Route input to functions or fallback to RAG
 def route_input(state):
     user_input = state["input"] 
-    plan_result = create_plan(state) 
+    if any(key in state for key in ("clarify", "reasoning", "steps", "final_instruction")): # Plan already produced by the create_plan node
+        plan_result = state
+    else:
+        plan_result = create_plan(state) 
     clarify = plan_result.get("clarify", None) 
     reasoning = plan_result.get("reasoning", "") 
     steps = plan_result.get("steps", []) 
@@ -102,6 +209,33 @@ def route_input(state):
 
     result = get_intent(user_input, clarify, reasoning, steps, final_instruction) 
 
+    routed_state = build_routed_state(user_input, result, clarify, reasoning, steps, final_instruction)
+    remember_routing(user_input, routed_state)
+    return routed_state
+
+
+# --- Single-pass planner + router (one LLM call)
+def plan_and_route(state: BitBudState) -> Dict[str, Any]:
+    user_input = state["input"]
+
+    logger.info(f"Single-pass planning and routing for user input: {user_input}")
+
+    result = get_plan_and_intent(user_input)
+
+    routed_state = build_routed_state(
+        user_input,
+        result.get("tool_calls", []),
+        result.get("clarify"),
+        result.get("reasoning", ""),
+        result.get("steps", []),
+        result.get("final_instruction", user_input)
+    )
+    remember_routing(user_input, routed_state)
+    return routed_state
+
+
+def build_routed_state(user_input, result, clarify, reasoning, steps, final_instruction) -> Dict[str, Any]:
+    """Turn an intent result into the state consumed by the execution nodes."""
     tool_chain = normalize_intent_result(result)
     
     if not tool_chain:
@@ -122,6 +256,13 @@ def route_input(state):
         args["user_input"] = user_input
         tool_chain[0]["args"] = args # Tool Chain Updated
 
+    emit_event("planning_done", {
+        "tool_chain": tool_chain,
+        "clarify": clarify,
+        "reasoning": reasoning,
+        "final_instruction": final_instruction
+    })
+
     return {
         "function": func,
         "args": args,
@@ -150,6 +291,8 @@ def execute_single_tool(state: BitBudState) -> Dict[str, Any]:
             "execution_results": execution_results
         }
     
+    emit_event("tool_started", {"function": func, "args": args})
+
     try:
         handler = FUNCTION_HANDLERS[func]
         
@@ -164,8 +307,11 @@ def execute_single_tool(state: BitBudState) -> Dict[str, Any]:
             result = handler(args.get("command", ""))
         elif func == "recommend_music":
             result = handler()
-        elif func in ["clock", "system_control", "fallback"]:
+        elif func in ["clock", "system_control"]:
             result = handler(args)
+        elif func == "fallback":
+            # Added at execution time only, routing results are shared by all users
+            result = handler({**args, "user_id": state.get("user_id")})
         elif func == "scraper_tool":
             result = handler(args)
         elif func == "email_manager":
@@ -178,6 +324,7 @@ def execute_single_tool(state: BitBudState) -> Dict[str, Any]:
         execution_results.append(output)  # Adding tool result to execution_results
         
         logger.info(f"Executed {func} with args {args}, result: {result}")
+        emit_event("tool_finished", {"function": func, "output": output})
         return {
             "output": output,
             "execution_results": execution_results
@@ -187,6 +334,7 @@ def execute_single_tool(state: BitBudState) -> Dict[str, Any]:
         error_msg = f"Error executing {func}: {str(e)}"
         execution_results.append(error_msg)  # Adding error to execution_results
         logger.error(error_msg)
+        emit_event("tool_finished", {"function": func, "output": error_msg, "error": True})
         return {
             "output": error_msg,
             "execution_results": execution_results
@@ -210,7 +358,8 @@ def process_tool_chain(state: BitBudState) -> Dict[str, Any]:
     temp_state = {
         "function": func,
         "args": args,
-        "execution_results": execution_results
+        "execution_results": execution_results,
+        "user_id": state.get("user_id")
     }
     
     # Execute the current tool
@@ -273,43 +422,80 @@ def decide_execution_path(state: BitBudState) -> str:
     return "execute_single_tool"
 
 
-def build_graph():
+def build_graph(routing_mode: str = None, stage: str = "full"):
+    """Build the BitBud graph. routing_mode is "two_stage" (plan, then route) or "single_pass".
+
+    stage="route" stops once the tool chain is decided, stage="execute" starts from a routed
+    state; together they run the same flow as stage="full" in two steps (see agent.batch).
+    """
+    routing_mode = routing_mode or ROUTING_MODE
+
     try:
-        logger.info("Starting to build BitBud graph...")
+        logger.info(f"Starting to build BitBud graph (routing mode: {routing_mode}, stage: {stage})...")
 
         graph = StateGraph(BitBudState)
 
-        # nodes - Added create_plan node
-        graph.add_node("create_plan", RunnableLambda(create_plan))
-        graph.add_node("route_input", RunnableLambda(route_input))
-        graph.add_node("execute_single_tool", RunnableLambda(execute_single_tool))
-        graph.add_node("process_tool_chain", RunnableLambda(process_tool_chain))
-        graph.add_node("finalize_tool_chain", RunnableLambda(finalize_tool_chain))
+        if stage == "route":
+            execution_targets = {"execute_single_tool": END, "process_tool_chain": END}
+        else:
+            execution_targets = {"execute_single_tool": "execute_single_tool", "process_tool_chain": "process_tool_chain"}
 
-        # entry point - now starts with planning
-        graph.set_entry_point("create_plan")
-        
-        # Flow: Plan -> Route -> Execute
-        graph.add_edge("create_plan", "route_input")
+            graph.add_node("execute_single_tool", RunnableLambda(execute_single_tool))
+            graph.add_node("process_tool_chain", RunnableLambda(process_tool_chain))
+            graph.add_node("finalize_tool_chain", RunnableLambda(finalize_tool_chain))
+
+            graph.add_conditional_edges("process_tool_chain", should_continue_chain, {
+                "continue_chain": "process_tool_chain",
+                "finalize_chain": "finalize_tool_chain"
+            })
 
-        # entry point and conditional edges
-        # graph.set_entry_point("route_input")
-        graph.add_conditional_edges("route_input", decide_execution_path, {
-            "execute_single_tool": "execute_single_tool",
-            "process_tool_chain": "process_tool_chain"
-        })
+            graph.add_edge("execute_single_tool", END)
+            graph.add_edge("finalize_tool_chain", END)
 
-        graph.add_conditional_edges("process_tool_chain", should_continue_chain, {
-            "continue_chain": "process_tool_chain",
-            "finalize_chain": "finalize_tool_chain"
-        })
+        if stage == "execute":
+            graph.set_conditional_entry_point(decide_execution_path, execution_targets)
+            logger.info("BitBud graph built successfully.")
+            return graph.compile()
 
-        graph.add_edge("execute_single_tool", END)
-        graph.add_edge("finalize_tool_chain", END)
+        if routing_mode == "single_pass":
+            # Flow: Plan + Route (one LLM call) -> Execute
+            graph.add_node("plan_and_route", RunnableLambda(plan_and_route))
+            planner_entry = router_node = "plan_and_route"
+        else:
+            if routing_mode != "two_stage":
+                logger.warning(f"Unknown routing mode '{routing_mode}', using two_stage")
+
+            # Flow: Plan -> Route -> Execute
+            graph.add_node("create_plan", RunnableLambda(create_plan))
+            graph.add_node("route_input", RunnableLambda(route_input))
+            graph.add_edge("create_plan", "route_input")
+            planner_entry, router_node = "create_plan", "route_input"
+
+        pre_routers = []
+        if FAST_PATH_ENABLED:
+            pre_routers.append(("fast_path", fast_path_route))
+        if SEMANTIC_CACHE_ENABLED:
+            pre_routers.append(("semantic_cache", semantic_cache_route))
+        if INTENT_CLASSIFIER_ENABLED:
+            pre_routers.append(("classify_intent", classify_intent_route))
+
+        # Flow: Pre-routers -> (Execute | next pre-router | Planner)
+        for i, (name, node) in enumerate(pre_routers):
+            graph.add_node(name, RunnableLambda(node))
+            next_node = pre_routers[i + 1][0] if i + 1 < len(pre_routers) else planner_entry
+            graph.add_conditional_edges(name, decide_after_pre_route, {
+                **execution_targets,
+                "fall_through": next_node
+            })
+
+        graph.set_entry_point(pre_routers[0][0] if pre_routers else planner_entry)
+
+        # conditional edges
+        graph.add_conditional_edges(router_node, decide_execution_path, execution_targets)
 
         logger.info("BitBud graph built successfully.")
         return graph.compile()
 
     except Exception as e:
         logger.exception("Failed to build BitBud graph due to:")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,288 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import logging
+import threading
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Words that occur in most memories: huge posting lists with near-zero IDF, so they are not indexed
+_STOPWORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have he her him his how i if in is it its
+me my of on or our she so that the their them then there they this to up was we were what when where
+which who why will with would you your about just like im dont
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+class _GrowableArray:
+    """Append-only 1-D NumPy array with amortised O(1) appends; `view()` is the filled part."""
+
+    def __init__(self, dtype, capacity: int = 16):
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self._data):
+            self._data = np.concatenate([self._data, np.zeros(len(self._data), dtype=self._data.dtype)])
+        self._data[self.size] = value
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "_GrowableArray":
+        array = cls(values.dtype, max(len(values), 4))
+        array._data[:len(values)] = values
+        array.size = len(values)
+        return array
+
+
+class LexicalIndex:
+    """Incremental BM25 inverted index of the memories in the main store, keyed by the same ids.
+
+    Postings live in process as NumPy arrays, so a query costs one vectorised pass per query term
+    rather than a scan. Documents are persisted to a SQLite table (one row per memory) from which
+    the postings are rebuilt at startup. The context summary counts at `context_weight` of the text.
+    Deletes are tombstones until they outnumber the live rows, then the postings are rebuilt
+    (from SQLite, or compacted in place when the index is memory-only).
+
+    Query terms found in more than `max_df` of the memories (and in more than `min_df_cut` of them,
+    so small stores keep every term) are skipped: their IDF is close to zero, yet their posting
+    lists would dominate the query time.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, k1: float = 1.2, b: float = 0.75, context_weight: float = 0.5,
+                 max_df: float = 0.1, min_df_cut: int = 1000):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self.context_weight = context_weight
+        self.max_df = max_df
+        self.min_df_cut = min_df_cut
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.search_ms = 0.0
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS lexical_memories (
+                    doc_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    content TEXT,
+                    context TEXT
+                )
+            """)
+            self._conn.commit()
+
+        self._rebuild()
+
+    # --- In-memory postings
+
+    def _reset(self):
+        self._row_of: Dict[str, int] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._user_codes: Dict[str, int] = {}
+        self._doc_user = _GrowableArray(np.int32)
+        self._doc_length = _GrowableArray(np.float32)
+        self._alive = _GrowableArray(np.bool_)
+        self._postings: Dict[str, tuple] = {}  # term -> (rows, weighted term frequencies)
+        self._total_length = 0.0
+        self._dead = 0
+
+    def _index(self, doc_id: str, user_id: str, content: str, context: Optional[str]):
+        weights = Counter(tokenize(content))
+        for token in tokenize(context):
+            weights[token] += self.context_weight
+
+        row = len(self._doc_ids)
+        self._row_of[doc_id] = row
+        self._doc_ids.append(doc_id)
+        self._doc_user.append(self._user_codes.setdefault(user_id, len(self._user_codes)))
+        length = float(sum(weights.values()))
+        self._doc_length.append(length)
+        self._alive.append(True)
+        self._total_length += length
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (_GrowableArray(np.int32, 4), _GrowableArray(np.float32, 4))
+            postings[0].append(row)
+            postings[1].append(weight)
+
+    def _unindex(self, doc_id: str):
+        row = self._row_of.pop(doc_id, None)
+        if row is None:
+            return
+        self._alive.view()[row] = False
+        self._total_length -= float(self._doc_length.view()[row])
+        self._doc_ids[row] = None
+        self._dead += 1
+
+    def _rebuild(self):
+        self._reset()
+        if self._conn is None:
+            return
+        for doc_id, user_id, content, context in self._conn.execute(
+                "SELECT doc_id, user_id, content, context FROM lexical_memories"):
+            self._index(doc_id, user_id, content, context)
+        if self._doc_ids:
+            logger.info(f"Lexical index loaded {len(self._doc_ids)} memories from {self.db_path}")
+
+    def _compact(self):
+        """Drop the tombstoned rows from the postings and renumber the live ones, without SQLite."""
+        alive = self._alive.view()
+        new_row = (np.cumsum(alive) - 1).astype(np.int32)
+
+        postings = {}
+        for term, (rows, frequencies) in self._postings.items():
+            rows, frequencies = rows.view(), frequencies.view()
+            keep = alive[rows]
+            if keep.any():
+                postings[term] = (_GrowableArray.from_array(new_row[rows[keep]]),
+                                  _GrowableArray.from_array(frequencies[keep]))
+        self._postings = postings
+
+        self._doc_ids = [doc_id for doc_id in self._doc_ids if doc_id is not None]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._doc_ids)}
+        self._doc_user = _GrowableArray.from_array(self._doc_user.view()[alive])
+        self._doc_length = _GrowableArray.from_array(self._doc_length.view()[alive])
+        self._alive = _GrowableArray.from_array(np.ones(len(self._doc_ids), dtype=np.bool_))
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # --- Updates
+
+    def add(self, ids: List[str], texts: List[str], contexts: List[Optional[str]], user_ids: List[str]):
+        rows = list(zip(ids, user_ids, texts, contexts))
+        with self._lock:
+            for doc_id, user_id, content, context in rows:
+                self._unindex(doc_id)
+                self._index(doc_id, user_id, content, context)
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO lexical_memories (doc_id, user_id, content, context) VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist lexical index rows: {e}")
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for doc_id in ids:
+                self._unindex(doc_id)
+            if self._conn is not None:
+                try:
+                    self._conn.executemany("DELETE FROM lexical_memories WHERE doc_id = ?", [(doc_id,) for doc_id in ids])
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to delete lexical index rows: {e}")
+            if self._dead > max(1000, len(self._row_of)):
+                if self._conn is not None:
+                    self._rebuild()
+                else:
+                    self._compact()
+
+    # --- Search
+
+    def search(self, query: str, user_id: str, k: int = 20) -> List[str]:
+        """Ids of the best `k` BM25 matches of `query` among the memories of `user_id`, best first."""
+        terms = set(tokenize(query))
+        start = time.perf_counter()
+
+        with self._lock:
+            user_code = self._user_codes.get(user_id)
+            live = len(self._row_of)
+            if user_code is None or not live or not terms:
+                return []
+
+            max_rows = max(self.max_df * live, self.min_df_cut)
+            postings = [self._postings[term] for term in terms
+                        if term in self._postings and self._postings[term][0].size <= max_rows]
+            if not postings:
+                return []
+            lengths = self._doc_length.view()
+            average_length = self._total_length / live or 1.0
+
+            row_lists, contributions = [], []
+            for rows, frequencies in postings:
+                rows, frequencies = rows.view(), frequencies.view()
+                idf = math.log(1.0 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / average_length)
+                row_lists.append(rows)
+                contributions.append(idf * frequencies * (self.k1 + 1.0) / (frequencies + norm))
+
+            if sum(len(rows) for rows in row_lists) * 16 < len(self._doc_ids):
+                # Selective query: sum per distinct row instead of touching a score slot per document
+                candidates, inverse = np.unique(np.concatenate(row_lists), return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+            else:
+                dense = np.zeros(len(self._doc_ids), dtype=np.float32)
+                for rows, contribution in zip(row_lists, contributions):
+                    dense[rows] += contribution
+                candidates = np.flatnonzero(dense)
+                scores = dense[candidates]
+
+            keep = self._alive.view()[candidates] & (self._doc_user.view()[candidates] == user_code)
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidates, scores = candidates[top], scores[top]
+            result = [self._doc_ids[row] for row in candidates[np.argsort(-scores, kind="stable")]]
+
+            self.searches += 1
+            self.search_ms += (time.perf_counter() - start) * 1000
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rows": len(self._row_of),
+                "terms": len(self._postings),
+                "searches": self.searches,
+                "avg_search_ms": round(self.search_ms / self.searches, 3) if self.searches else 0.0
+            }
+
+
+_index: Optional[LexicalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """The shared index of the main memory store, or None when RETRIEVAL_LEXICAL_ENABLED is off."""
+    global _index
+    from agent.config import RETRIEVAL_LEXICAL_ENABLED, LEXICAL_INDEX_PATH
+
+    if not RETRIEVAL_LEXICAL_ENABLED:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(LEXICAL_INDEX_PATH or None)
+    return _index
+
+
+def get_lexical_index_stats() -> Dict[str, Any]:
+    if _index is None:
+        return {"rows": 0, "searches": 0, "avg_search_ms": 0.0}
+    return _index.stats()
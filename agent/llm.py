@@ -1,9 +1,14 @@
-import re
 from langchain_community.llms import Ollama
-from typing import Optional, TypedDict
 import json
+from functools import lru_cache
+from typing import Optional, TypedDict
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableLambda
+from agent.llm_cache import LLMResponseCache, CachedLLM
+from agent.config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_POLICIES, CONSTRAINED_JSON_ENABLED
+from agent.json_decoding import (OllamaJSONGenerator, parse_json_tolerant, record_json_parse,
+                                 PLAN_SCHEMA, INTENT_SCHEMA, PLAN_AND_INTENT_SCHEMA, EMAIL_SCHEMA,
+                                 CONTEXT_SUMMARIES_SCHEMA)
 
 
 SYSTEM_PROMPT_PATH = "agent/prompts/system_prompt.txt"
@@ -12,15 +17,59 @@ CONEXT_SUMMARY_PROMPT_PATH = "agent/prompts/context_summary_prompt.txt"
 TEXT_TO_SHELL_PROMPT_PATH = "agent/prompts/text_to_shell_prompt.txt"
 
 llm = Ollama(model="gemma3:4b")
+json_llm = Ollama(model="gemma3:4b", format="json") # Constrained to emit a single JSON value
+
+# Exact-prompt response cache, opted into per prompt type (see LLM_CACHE_POLICIES)
+llm_response_cache = LLMResponseCache(
+    db_path=LLM_CACHE_PATH if LLM_CACHE_ENABLED else None,
+    max_memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+    policies=LLM_CACHE_POLICIES if LLM_CACHE_ENABLED else {}
+)
+cached_llm = CachedLLM(llm, llm_response_cache)
+cached_json_llm = CachedLLM(json_llm, llm_response_cache)
+
+# Schema-constrained generators, stopped as soon as the JSON value closes
+schema_llms = {
+    name: CachedLLM(OllamaJSONGenerator(llm.model, schema, base_url=llm.base_url), llm_response_cache)
+    for name, schema in (("plan", PLAN_SCHEMA), ("intent", INTENT_SCHEMA),
+                         ("plan_and_intent", PLAN_AND_INTENT_SCHEMA), ("write_email", EMAIL_SCHEMA),
+                         ("context_summaries", CONTEXT_SUMMARIES_SCHEMA))
+}
+
+
+def generate_json(prompt: str, prompt_type: str, unconstrained_llm: CachedLLM = None):
+    """Generate and parse a JSON answer for `prompt_type`, schema-constrained unless disabled in config."""
+    if CONSTRAINED_JSON_ENABLED:
+        mode, generator = "constrained", schema_llms[prompt_type]
+    else:
+        mode, generator = "unconstrained", unconstrained_llm or cached_llm
+
+    raw = generator.invoke(prompt, prompt_type)
+    try:
+        result = parse_json_tolerant(raw)
+    except ValueError as e:
+        record_json_parse(prompt_type, mode, False)
+        raise ValueError(f"{e}; raw output: {raw[:200]!r}") from e
+
+    record_json_parse(prompt_type, mode, True)
+    return result
 
 def load_system_prompt(file_path: str) -> str:
     with open(file_path, "r", encoding="utf-8") as f:
         return f.read().strip()
 
-system_prompt = load_system_prompt(SYSTEM_PROMPT_PATH)
+@lru_cache(maxsize=None)
+def get_system_prompt() -> str:
+    """Router prompt, read on first use instead of at import time."""
+    return load_system_prompt(SYSTEM_PROMPT_PATH)
+
+def get_router_instructions() -> str:
+    """Router rules/examples without the trailing "User:" slot, for prompts that append their own output format."""
+    system_prompt = get_system_prompt()
+    return system_prompt[:-len("User:")].rstrip() if system_prompt.endswith("User:") else system_prompt
 
 def get_intent(user_input, clarify, reasoning, steps, final_instruction) -> dict:
-    prompt = system_prompt + user_input + "\n\n" + \
+    prompt = get_system_prompt() + user_input + "\n\n" + \
              "### ADDITIONAL INFORMATION" + \
              f"Clarifications: {clarify}\n" + \
              f"Reasoning: {reasoning}\n" + \
@@ -28,13 +77,11 @@ def get_intent(user_input, clarify, reasoning, steps, final_instruction) -> dict
              f"Final Instruction: {final_instruction}\n\n"
 
     try:
-        raw_response = llm.invoke(prompt).strip()
-        json_block = re.sub(r"^```(?:json)?\n|\n```$", "", raw_response.strip(), flags=re.IGNORECASE) # Removing md block
-        return json.loads(json_block)
+        return generate_json(prompt, "intent")
 
     except Exception as e:
         print("[Intent parsing failed]", e)
-        return {"function": "fallback", "args": {}, "error": str(e), "raw": raw_response}
+        return {"function": "fallback", "args": {}, "error": str(e)}
 
 # --- Prompt builder
 def build_rag_prompt(user_input: str, memory_context_docs: list[str], about_context_docs: list[str]) -> str:
@@ -76,10 +123,73 @@ Answer only with the cleaned-up, standalone context summary — no explanation,
 Message: {text}
 Summary:
 """
-    summary = llm.invoke(prompt).strip()
+    summary = cached_llm.invoke(prompt, "context_summary").strip()
     return None if summary.lower() == "none" else summary
 
 
+def generate_context_summaries(texts: list[str]) -> list:
+    """Context summaries for several messages in one generation (used by the memory ingestion queue).
+
+    Falls back to one generate_context_summary call per message if the batch answer doesn't line up.
+    """
+    if len(texts) <= 1:
+        return [generate_context_summary(text) for text in texts]
+
+    messages = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, start=1))
+    prompt = f"""
+You are a Mitchi, a memory assistant.
+
+Please generate a **short, high-quality contextual summary** for each of the numbered messages below. The goal is to help retrieve each message later based on its intent, meaning, or relevance.
+
+Focus on:
+- The user’s **intent or fact stated** (e.g. they shared their name, asked a question, gave a command, made a preference known, etc.)
+- Any **personal data** (like name, location, preferences)
+- Any **task, question, or command** they gave
+- Be **succinct, self-contained**, and only output the context.
+
+Do **NOT** include generic statements like “The user said something” — instead be precise (e.g., “User shared their name is Ayush”).
+
+Answer only with a JSON array of {len(texts)} strings, one summary per message in the same order. Use "none" for a message with nothing worth remembering.
+
+
+Messages:
+{messages}
+Summaries:
+"""
+    try:
+        summaries = generate_json(prompt, "context_summaries")
+        if not isinstance(summaries, list) or len(summaries) != len(texts):
+            raise ValueError(f"expected {len(texts)} summaries, got {summaries!r:.200}")
+    except Exception as e:
+        print("[Context summaries failed, summarising one by one]", e)
+        return [generate_context_summary(text) for text in texts]
+
+    summaries = [str(summary).strip() for summary in summaries]
+    return [None if not summary or summary.lower() == "none" else summary for summary in summaries]
+
+
+def generate_session_digest(texts: list[str]) -> Optional[str]:
+    """One memory entry standing in for a whole old conversation session (used by memory consolidation)."""
+    conversation = "\n".join(f"- {text}" for text in texts)
+    prompt = f"""
+You are a Mitchi, a memory assistant.
+
+Below is an old conversation between the user and Mitchi, one message per line. Condense it into a **short digest** that keeps what is worth remembering later:
+- Facts the user shared about themselves (name, location, preferences, plans)
+- Questions they asked and tasks or commands they gave, with the outcome if stated
+- Drop greetings, small talk and anything repeated
+
+Answer only with the digest as a few plain sentences — no explanation, no prefixes. Answer "none" if nothing is worth keeping.
+
+
+Conversation:
+{conversation}
+Digest:
+"""
+    digest = cached_llm.invoke(prompt, "session_digest").strip()
+    return None if not digest or digest.lower() == "none" else digest
+
+
 def text_to_shell_command(message: str) -> str:
     prompt = f"""You are a Linux command generator.
 Given a user's request in plain English, output the most appropriate shell command.
@@ -87,7 +197,7 @@ Only output the shell command, nothing else. Do **NOT** include any explanations
 
 User: {message}
 Command:"""
-    cmd = llm.invoke(prompt).strip()
+    cmd = cached_llm.invoke(prompt, "shell_command").strip()
     return cmd if cmd else "echo 'No command generated'"
 
 
@@ -218,10 +328,7 @@ Respond with a ***pure JSON*** object only:
 """.strip()
 
     try:
-        raw = llm.invoke(prompt).strip()
-        json_block = raw.strip("` \n").replace("json\n", "")
-        # print (json_block)
-        return json.loads(json_block)
+        return generate_json(prompt, "plan")
     
     except Exception as e:
         print("[get_llm_plan ERROR]", e)
@@ -232,6 +339,58 @@ Respond with a ***pure JSON*** object only:
             "final_instruction": user_input
         }
     
+def get_plan_and_intent(user_input: str) -> dict:
+    """Single-pass routing: plan fields and tool calls from one constrained generation."""
+    prompt = get_router_instructions() + f"""
+
+### SINGLE-PASS MODE ###
+
+Before choosing the tool calls, briefly plan like Mitchi's internal Planning Agent:
+    - clarify: ask ONLY if a parameter is essential but missing, otherwise null
+    - reasoning: one or two sentences on what the user intends
+    - steps: the steps to perform, in clean language, using the available tools only
+    - final_instruction: a concise rewritten instruction the router can process
+
+This overrides the OUTPUT FORMAT above. Respond with a single, strict JSON object only:
+{{
+  "clarify": str or null,
+  "reasoning": str,
+  "steps": [list of steps],
+  "final_instruction": str,
+  "tool_calls": [ {{ "function": "<function_name>", "args": {{ <argument_dict> }} }} ]
+}}
+
+### USER INPUT:
+\"\"\"{user_input}\"\"\"
+""".rstrip()
+
+    try:
+        result = generate_json(prompt, "plan_and_intent", unconstrained_llm=cached_json_llm)
+        if not isinstance(result, dict):
+            raise ValueError(f"Expected a JSON object, got {type(result).__name__}")
+
+        tool_calls = result.get("tool_calls", [])
+        if isinstance(tool_calls, dict):
+            tool_calls = [tool_calls]
+
+        return {
+            "clarify": result.get("clarify"),
+            "reasoning": result.get("reasoning", ""),
+            "steps": result.get("steps", []) or [],
+            "final_instruction": result.get("final_instruction") or user_input,
+            "tool_calls": tool_calls if isinstance(tool_calls, list) else []
+        }
+
+    except Exception as e:
+        print("[get_plan_and_intent ERROR]", e)
+        return {
+            "clarify": None,
+            "reasoning": "Fallback: could not parse single-pass plan.",
+            "steps": [],
+            "final_instruction": user_input,
+            "tool_calls": [{"function": "fallback", "args": {}}]
+        }
+
 def get_email_summary(date:str, sender: str,  subject:str, email_body: str) -> str:
     prompt = f"""You are Mitchi, a personal AI agent specializing in summarizing emails.
 Your task is to generate a concise, high-quality summary of an email body.
@@ -245,7 +404,7 @@ From: {sender}
 Subject: {subject}
 Email body: {email_body}
 Summary:"""
-    summary = llm.invoke(prompt).strip()
+    summary = cached_llm.invoke(prompt, "email_summary").strip()
     return None if summary.lower() == "none" else summary
 
 
@@ -280,7 +439,6 @@ Format the output as a JSON object with the following structure:
 
 DO **NOT** include any additional explanations or text outside the JSON object.
 """
-    email_content = llm.invoke(prompt).strip()
-    email_content_json = re.sub(r"^```(?:json)?\n|\n```$", "", email_content.strip(), flags=re.IGNORECASE) # Removing md block
-    print("[write_email] Generated content:", email_content_json)
-    return None if json.loads(email_content_json) == "none" else json.loads(email_content_json)
\ No newline at end of file
+    email_content = generate_json(prompt, "write_email")
+    print("[write_email] Generated content:", email_content)
+    return None if email_content == "none" else email_content
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Two-tier (in-memory LRU + SQLite) cache of LLM responses keyed by model + prompt hash.
+
+    `policies` maps a prompt type to {"enabled": bool, "ttl": seconds or None}. Prompt types
+    without a policy use `default_policy`; calls without a prompt type are never cached.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_memory_entries: int = 256,
+                 policies: Optional[Dict[str, Dict[str, Any]]] = None,
+                 default_policy: Optional[Dict[str, Any]] = None):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.policies = policies or {}
+        self.default_policy = default_policy or {"enabled": False, "ttl": None}
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, expires_at)
+        self._stats: Dict[str, Counter] = {}
+        self._conn = None
+
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        model TEXT,
+                        prompt_type TEXT,
+                        response TEXT,
+                        created REAL,
+                        expires_at REAL
+                    )
+                """)
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to open LLM cache database, using memory tier only: {e}")
+                self._conn = None
+
+    def policy(self, prompt_type: Optional[str]) -> Dict[str, Any]:
+        if prompt_type is None:
+            return {"enabled": False, "ttl": None}
+        return self.policies.get(prompt_type, self.default_policy)
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, prompt_type: str, name: str):
+        self._stats.setdefault(prompt_type, Counter())[name] += 1
+
+    def get(self, key: str, prompt_type: str) -> Optional[str]:
+        now = time.time()
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                response, expires_at = cached
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count(prompt_type, "memory_hits")
+                    return response
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._remember(key, response, expires_at)
+                        self._count(prompt_type, "disk_hits")
+                        return response
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._count(prompt_type, "misses")
+        return None
+
+    def _remember(self, key: str, response: str, expires_at: Optional[float]):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, model: str, prompt_type: str, response: str):
+        ttl = self.policy(prompt_type).get("ttl")
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+
+        with self._lock:
+            self._remember(key, response, expires_at)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, model, prompt_type, response, created, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, model, prompt_type, response, now, expires_at)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist LLM cache entry: {e}")
+
+    def purge_expired(self) -> int:
+        if self._conn is None:
+            return 0
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_type = {}
+            for prompt_type, counter in self._stats.items():
+                lookups = counter["memory_hits"] + counter["disk_hits"] + counter["misses"]
+                hits = counter["memory_hits"] + counter["disk_hits"]
+                by_type[prompt_type] = {
+                    **dict(counter),
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                }
+            return {"memory_entries": len(self._memory), "prompt_types": by_type}
+
+
+class CachedLLM:
+    """Wraps an LLM so that `invoke(prompt, prompt_type)` is served from an LLMResponseCache.
+
+    Everything else (stream, model, ...) is passed through to the wrapped LLM.
+    """
+
+    def __init__(self, llm, cache: LLMResponseCache):
+        self.llm = llm
+        self.cache = cache
+        self.model_key = f"{getattr(llm, 'model', '')}|format={getattr(llm, 'format', None)}"
+
+    def invoke(self, prompt: str, prompt_type: Optional[str] = None, **kwargs) -> str:
+        if not self.cache.policy(prompt_type).get("enabled"):
+            return self.llm.invoke(prompt, **kwargs)
+
+        key = self.cache.make_key(self.model_key, prompt)
+        cached = self.cache.get(key, prompt_type)
+        if cached is not None:
+            return cached
+
+        response = self.llm.invoke(prompt, **kwargs)
+        if isinstance(response, str) and response.strip():
+            self.cache.put(key, self.model_key, prompt_type, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
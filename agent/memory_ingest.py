@@ -0,0 +1,162 @@
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (text, metadata) pairs waiting to be summarised, embedded and written
+MemoryItem = Tuple[str, Dict[str, Any]]
+
+_STOP = object()
+
+
+class IngestionQueue:
+    """Write-behind queue for conversation memories.
+
+    A single worker thread drains up to `batch_size` items (waiting at most `batch_wait`
+    seconds for a batch to fill) and hands them to `writer` in one call, so summaries,
+    embeddings and the Chroma write are done in bulk and off the request path.
+    When the queue is full, `submit` writes the item on the caller's thread instead of dropping it.
+    """
+
+    def __init__(self, writer: Callable[[List[MemoryItem]], None], max_size: int = 256,
+                 batch_size: int = 16, batch_wait: float = 0.5):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.inline_writes = 0
+        self.last_batch_ms = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="mitchi-memory-ingest")
+                self._thread.start()
+
+    def submit(self, text: str, metadata: Dict[str, Any]):
+        item = (text, metadata)
+        try:
+            self._queue.put_nowait(item)
+            with self._lock:
+                self.enqueued += 1
+        except queue.Full:
+            logger.warning("Memory ingestion queue full, writing inline")
+            with self._lock:
+                self.inline_writes += 1
+            self._write([item])
+
+    def _next_batch(self) -> Tuple[List[MemoryItem], bool]:
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, batch: List[MemoryItem]):
+        start = time.perf_counter()
+        try:
+            self.writer(batch)
+            ok = True
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} memories: {e}")
+            ok = False
+
+        with self._lock:
+            if ok:
+                self.written += len(batch)
+            else:
+                self.failed += len(batch)
+            self.batches += 1
+            self.last_batch_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until everything submitted so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self, timeout: float = 30.0):
+        """Write out what is still queued and stop the worker (registered with atexit)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        pending = self._queue.qsize()
+        if pending:
+            print(f"[Memory] Flushing {pending} queued memories before shutdown...")
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Memory ingestion did not finish within {timeout}s, {self._queue.qsize()} memories lost")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "max_size": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "inline_writes": self.inline_writes,
+                "last_batch_ms": self.last_batch_ms
+            }
+
+
+_ingest_queue: Optional[IngestionQueue] = None
+_ingest_queue_lock = threading.Lock()
+
+
+def get_ingest_queue(writer: Callable[[List[MemoryItem]], None]) -> IngestionQueue:
+    """The shared ingestion queue, started on first use with `writer` and flushed at exit."""
+    global _ingest_queue
+
+    if _ingest_queue is None:
+        with _ingest_queue_lock:
+            if _ingest_queue is None:
+                from agent.config import MEMORY_INGEST_QUEUE_SIZE, MEMORY_INGEST_BATCH_SIZE, MEMORY_INGEST_BATCH_WAIT
+
+                ingest_queue = IngestionQueue(
+                    writer,
+                    max_size=MEMORY_INGEST_QUEUE_SIZE,
+                    batch_size=MEMORY_INGEST_BATCH_SIZE,
+                    batch_wait=MEMORY_INGEST_BATCH_WAIT
+                )
+                ingest_queue.start()
+                atexit.register(ingest_queue.stop)
+                _ingest_queue = ingest_queue
+
+    return _ingest_queue
+
+
+def get_ingest_queue_stats() -> Dict[str, Any]:
+    if _ingest_queue is None:
+        return {"depth": 0, "enqueued": 0, "written": 0, "failed": 0, "batches": 0, "inline_writes": 0}
+    return _ingest_queue.stats()
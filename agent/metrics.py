@@ -0,0 +1,30 @@
+from typing import Any, Dict
+from agent.intent_rules import get_fast_path_stats
+from agent.intent_classifier import get_intent_classifier_stats
+from agent.semantic_cache import get_semantic_cache_stats
+from agent.json_decoding import get_json_parse_stats
+from agent.startup import get_startup_stats
+from agent.memory_ingest import get_ingest_queue_stats
+from agent.embedding_cache import get_embedding_cache_stats
+from agent.retention import get_retention_stats
+from agent.session_buffer import get_session_buffer_stats
+from agent.lexical_index import get_lexical_index_stats
+
+
+def collect_stats() -> Dict[str, Any]:
+    """Runtime counters of the routing and caching layers, served on GET /stats."""
+    from agent.llm import llm_response_cache
+
+    return {
+        "fast_path": get_fast_path_stats(),
+        "intent_classifier": get_intent_classifier_stats(),
+        "semantic_cache": get_semantic_cache_stats(),
+        "llm_cache": llm_response_cache.stats(),
+        "json_parse": get_json_parse_stats(),
+        "startup": get_startup_stats(),
+        "memory_ingest": get_ingest_queue_stats(),
+        "embedding_cache": get_embedding_cache_stats(),
+        "retention": get_retention_stats(),
+        "session_buffer": get_session_buffer_stats(),
+        "lexical_index": get_lexical_index_stats()
+    }
@@ -0,0 +1,112 @@
+import numpy as np
+from typing import List, Optional
+
+
+def cosine_similarities(query_vector: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of `query_vector` (d,) against each row of `vectors` (n, d)."""
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+    return (vectors @ query_vector) / np.where(norms == 0, 1.0, norms)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def relevance_scores(similarities: np.ndarray, timestamps: np.ndarray, same_session: np.ndarray,
+                     now: float, half_life_hours: float = 24.0, recency_weight: float = 0.2,
+                     session_boost: float = 1.5, context_similarities: Optional[np.ndarray] = None,
+                     context_boost: float = 0.3) -> np.ndarray:
+    """similarity x recency x session x context boosts, for all candidates at once.
+
+    Recency decays exponentially: a memory from right now gets (1 + recency_weight), one
+    `half_life_hours` old gets (1 + recency_weight / 2). Candidates without a timestamp (NaN) get no boost.
+    """
+    age_hours = np.maximum(now - timestamps, 0.0) / 3600
+    recency = np.nan_to_num(np.exp2(-age_hours / half_life_hours), nan=0.0)
+
+    scores = np.maximum(similarities, 0.0)
+    scores = scores * (1.0 + recency_weight * recency)
+    scores = scores * np.where(same_session, session_boost, 1.0)
+    if context_similarities is not None:
+        scores = scores * (1.0 + context_boost * np.maximum(np.nan_to_num(context_similarities, nan=0.0), 0.0))
+    return scores
+
+
+def mmr_select(scores: np.ndarray, vectors: np.ndarray, k: int, mmr_lambda: float = 0.7) -> List[int]:
+    """Greedy maximal marginal relevance: trade relevance against similarity to what is already picked.
+
+    mmr_lambda=1 is plain top-k by score, lower values favour diversity.
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return []
+
+    relevance = scores / (scores.max() or 1.0)
+    unit = _normalize_rows(vectors)
+    pairwise = unit @ unit.T
+
+    selected = [int(np.argmax(relevance))]
+    max_redundancy = pairwise[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, n):
+        mmr = mmr_lambda * relevance - (1.0 - mmr_lambda) * max_redundancy
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        max_redundancy = np.maximum(max_redundancy, pairwise[best])
+
+    return selected
+
+
+def reciprocal_rank_fusion(similarities: np.ndarray, lexical_ranks: np.ndarray, rrf_k: int = 60) -> np.ndarray:
+    """RRF of the vector ranking (by `similarities`) and the BM25 ranking, scaled to (0, 1].
+
+    `lexical_ranks` holds each candidate's 0-based BM25 rank, -1 for candidates BM25 did not return.
+    """
+    vector_ranks = np.empty(len(similarities))
+    vector_ranks[np.argsort(-similarities, kind="stable")] = np.arange(len(similarities))
+    fused = 1.0 / (rrf_k + 1 + vector_ranks)
+    fused += np.where(lexical_ranks >= 0, 1.0 / (rrf_k + 1 + lexical_ranks), 0.0)
+    return fused * (rrf_k + 1) / 2
+
+
+def rerank(query_vector: np.ndarray, vectors: np.ndarray, timestamps: np.ndarray, same_session: np.ndarray,
+           k: int, now: float, score_threshold: float = 0.0, context_similarities: Optional[np.ndarray] = None,
+           half_life_hours: float = 24.0, recency_weight: float = 0.2, session_boost: float = 1.5,
+           context_boost: float = 0.3, mmr_lambda: float = 0.7, lexical_ranks: Optional[np.ndarray] = None,
+           rrf_k: int = 60) -> List[int]:
+    """Indices of the `k` candidates to return, best first.
+
+    Candidates whose raw cosine similarity to the query is below `score_threshold` are dropped
+    before boosting, so a recent or same-session memory can't be promoted from irrelevance.
+    With `lexical_ranks`, the base score is the reciprocal rank fusion of both rankings and BM25 hits
+    are exempt from the threshold: an exact name or number match is what the embedding misses.
+    """
+    if len(vectors) == 0:
+        return []
+
+    similarities = cosine_similarities(query_vector, vectors)
+    passed = similarities >= score_threshold
+    if lexical_ranks is not None:
+        passed |= lexical_ranks >= 0
+    keep = np.flatnonzero(passed)
+    if len(keep) == 0:
+        return []
+
+    base = similarities[keep]
+    if lexical_ranks is not None:
+        base = reciprocal_rank_fusion(base, lexical_ranks[keep], rrf_k)
+
+    scores = relevance_scores(
+        base, timestamps[keep], same_session[keep], now,
+        half_life_hours=half_life_hours,
+        recency_weight=recency_weight,
+        session_boost=session_boost,
+        context_similarities=context_similarities[keep] if context_similarities is not None else None,
+        context_boost=context_boost
+    )
+    return [int(keep[i]) for i in mmr_select(scores, vectors[keep], k, mmr_lambda)]
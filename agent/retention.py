@@ -0,0 +1,66 @@
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+_stop = threading.Event()
+_stats: Dict[str, Any] = {"runs": 0, "deleted": 0, "digested": 0, "last_run": None, "last_deleted": None, "last_duration_ms": None, "last_error": None}
+
+
+def run_retention() -> int:
+    """One compaction pass over the memory store: expire old memories, then digest old sessions.
+
+    Returns the number of memories deleted by expiry.
+    """
+    from agent.chromaMemory import cleanup_old_memories, consolidate_old_sessions
+
+    start = time.perf_counter()
+    deleted = digested = 0
+    try:
+        deleted = cleanup_old_memories()
+        digested = consolidate_old_sessions()
+        error = None
+    except Exception as e:
+        logger.exception("Memory retention run failed:")
+        error = str(e)
+
+    _stats["runs"] += 1
+    _stats["deleted"] += deleted
+    _stats["digested"] += digested
+    _stats["last_run"] = time.time()
+    _stats["last_deleted"] = deleted
+    _stats["last_duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    _stats["last_error"] = error
+    return deleted
+
+
+def _run_scheduler(interval_seconds: float):
+    while not _stop.is_set():
+        run_retention()
+        _stop.wait(interval_seconds)
+
+
+def start_retention_scheduler():
+    """Run memory retention now and then every MEMORY_CLEANUP_INTERVAL_HOURS in a background thread (once)."""
+    global _scheduler_thread
+    from agent.config import MEMORY_CLEANUP_INTERVAL_HOURS
+
+    with _scheduler_lock:
+        if _scheduler_thread is None and MEMORY_CLEANUP_INTERVAL_HOURS > 0:
+            _scheduler_thread = threading.Thread(
+                target=_run_scheduler, args=(MEMORY_CLEANUP_INTERVAL_HOURS * 3600,),
+                daemon=True, name="mitchi-retention"
+            )
+            _scheduler_thread.start()
+
+
+def stop_retention_scheduler():
+    _stop.set()
+
+
+def get_retention_stats() -> Dict[str, Any]:
+    return dict(_stats)
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+import numpy as np
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from agent.intent_classifier import chain_is_grounded, chain_signature, is_auto_routable
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Planner/router results keyed by utterance embedding.
+
+    A lookup is a hit when a cached utterance is at least `threshold` cosine-similar, has not
+    outlived `ttl_seconds`, and every text-derived argument of its tool chain also appears in
+    the new utterance as whole tokens, with the same am/pm (so "set alarm for 6:30 am" is never
+    served for "set alarm for 7:00", "... 16:30" or "... 6:30 pm"). Chains the intent classifier never auto-routes (shutdown,
+    kill_process, send_email, shell commands) are neither stored nor served.
+    Entries are evicted least-recently-used beyond `max_entries`.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.95, max_entries: int = 512,
+                 ttl_seconds: float = 7 * 24 * 3600, persist_path: Optional[str] = None,
+                 save_interval: float = 30.0):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # utterance -> entry, LRU order
+        self._matrix: Optional[np.ndarray] = None  # (max_entries, dim), row per entry
+        self._row_keys: List[Optional[str]] = [None] * max_entries
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        self._stats = Counter()
+        self._dirty = False
+        self._last_save = 0.0
+
+    @staticmethod
+    def _key(utterance: str) -> str:
+        return " ".join(utterance.lower().split())
+
+    def _embed(self, utterance: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(self._key(utterance)), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry["created"] > self.ttl_seconds
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._row_keys[entry["row"]] = None
+        self._free_rows.append(entry["row"])
+
+    def _insert(self, key: str, vector: np.ndarray, entry: Dict[str, Any]):
+        if key in self._entries:
+            self._remove(key)
+        while not self._free_rows:
+            self._remove(next(iter(self._entries)))  # Evict least recently used
+            self._stats["evictions"] += 1
+
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        row = self._free_rows.pop()
+        self._matrix[row] = vector
+        self._row_keys[row] = key
+        entry["row"] = row
+        self._entries[key] = entry
+
+    def get(self, utterance: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of {"plan": {...}, "tool_chain": [...], "similarity": float} or None."""
+        vector = self._embed(utterance)
+        now = time.time()
+
+        with self._lock:
+            if not self._entries:
+                self._stats["misses"] += 1
+                return None
+
+            sims = self._matrix @ vector
+            occupied = np.array([key is not None for key in self._row_keys])
+            sims[~occupied] = -1.0
+
+            for row in np.argsort(-sims)[:3]:
+                if sims[row] < self.threshold:
+                    break
+                key = self._row_keys[row]
+                entry = self._entries[key]
+                if self._expired(entry, now):
+                    self._remove(key)
+                    self._stats["expired"] += 1
+                    self._dirty = True
+                    continue
+                if not chain_is_grounded(entry["tool_chain"], utterance, entry["utterance"]):
+                    self._stats["stale_args"] += 1
+                    continue
+
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return json.loads(json.dumps({
+                    "plan": entry["plan"],
+                    "tool_chain": entry["tool_chain"],
+                    "similarity": float(sims[row]),
+                }))
+
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, utterance: str, plan: Dict[str, Any], tool_chain: List[Dict[str, Any]]):
+        # Destructive or outward-facing routings always go through the LLM router
+        if not is_auto_routable(chain_signature(tool_chain)):
+            with self._lock:
+                self._stats["not_cacheable"] += 1
+            return
+
+        # The fallback handler gets the live user input at serve time, never a cached one
+        tool_chain = [
+            {"function": call.get("function"),
+             "args": {k: v for k, v in (call.get("args") or {}).items() if k != "user_input"}}
+            for call in tool_chain
+        ]
+        entry = {
+            "utterance": utterance,
+            "plan": {
+                "clarify": plan.get("clarify"),
+                "reasoning": plan.get("reasoning", ""),
+                "steps": list(plan.get("steps") or []),
+                "final_instruction": plan.get("final_instruction", utterance),
+            },
+            "tool_chain": tool_chain,
+            "created": time.time(),
+        }
+        vector = self._embed(utterance)
+
+        with self._lock:
+            self._insert(self._key(utterance), vector, entry)
+            self._stats["stores"] += 1
+            self._dirty = True
+
+        if time.time() - self._last_save > self.save_interval:
+            self.save()
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            keys = list(self._entries)  # LRU order
+            records = [{k: v for k, v in self._entries[key].items() if k != "row"} for key in keys]
+            vectors = (np.stack([self._matrix[self._entries[key]["row"]] for key in keys])
+                       if keys else np.zeros((0, 0), dtype=np.float32))
+            self._dirty = False
+            self._last_save = time.time()
+
+        try:
+            os.makedirs(self.persist_path, exist_ok=True)
+            np.save(os.path.join(self.persist_path, "vectors.npy"), vectors)
+            with open(os.path.join(self.persist_path, "entries.json"), "w", encoding="utf-8") as f:
+                json.dump(records, f)
+        except Exception as e:
+            logger.error(f"Failed to persist semantic cache: {e}")
+
+    def load(self):
+        if not self.persist_path:
+            return
+        vectors_path = os.path.join(self.persist_path, "vectors.npy")
+        entries_path = os.path.join(self.persist_path, "entries.json")
+        if not (os.path.exists(vectors_path) and os.path.exists(entries_path)):
+            return
+
+        try:
+            vectors = np.load(vectors_path)
+            with open(entries_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load semantic cache, starting empty: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for record, vector in zip(records, vectors):
+                if not self._expired(record, now):
+                    self._insert(self._key(record["utterance"]), vector.astype(np.float32), record)
+        logger.info(f"Semantic cache loaded {len(self._entries)} entries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "lookups": lookups,
+                **{name: self._stats[name] for name in ("hits", "misses", "stale_args", "expired", "evictions", "stores", "not_cacheable")},
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Lazily build the shared routing cache on top of the memory embedding model."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from agent.chromaMemory import get_embedding_func
+                from agent.config import (SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES,
+                                          SEMANTIC_CACHE_TTL_SECONDS, SEMANTIC_CACHE_PATH)
+
+                embedding_func = get_embedding_func()
+                if embedding_func is None:
+                    logger.warning("Embedding function unavailable, semantic cache disabled")
+                    return None
+
+                cache = SemanticCache(
+                    embedding_func,
+                    threshold=SEMANTIC_CACHE_THRESHOLD,
+                    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+                    persist_path=SEMANTIC_CACHE_PATH
+                )
+                cache.load()
+                atexit.register(cache.save)
+                _cache = cache
+
+    return _cache
+
+
+def get_semantic_cache_stats() -> Dict[str, Any]:
+    if _cache is None:
+        return {"entries": 0, "lookups": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+    return _cache.stats()
@@ -0,0 +1,98 @@
+import time
+import threading
+import numpy as np
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SessionBuffer:
+    """Ring buffer of the last `max_turns` turns of one session, the hot memory tier.
+
+    Turns are embedded lazily (on the first dedup check) so appending stays off the embedding path.
+    """
+
+    def __init__(self, max_turns: int = 12):
+        self._turns = deque(maxlen=max_turns)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def append(self, text: str, timestamp: float = None):
+        with self._lock:
+            self._turns.append({"text": text, "timestamp": timestamp or time.time(), "vector": None})
+
+    def turns(self, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Oldest first."""
+        with self._lock:
+            turns = list(self._turns)
+        return turns[-last:] if last else turns
+
+    def oldest_timestamp(self) -> Optional[float]:
+        with self._lock:
+            return self._turns[0]["timestamp"] if self._turns else None
+
+    def unit_vectors(self, embed: Callable[[List[str]], List[List[float]]]) -> np.ndarray:
+        """(turns, dim) L2-normalised embeddings, embedding the turns that have none yet in one call."""
+        with self._lock:
+            turns = list(self._turns)
+        missing = [turn for turn in turns if turn["vector"] is None]
+        if missing:
+            vectors = np.asarray(embed([turn["text"] for turn in missing]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            for turn, vector in zip(missing, vectors):
+                turn["vector"] = vector
+        return np.stack([turn["vector"] for turn in turns]) if turns else np.zeros((0, 0), dtype=np.float32)
+
+
+class SessionBuffers:
+    """(user_id, session_id) -> SessionBuffer, keeping the `max_sessions` most recently used sessions
+    of each user, so one busy user cannot evict another's hot tier."""
+
+    def __init__(self, max_turns: int = 12, max_sessions: int = 8):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self._buffers: "Dict[Optional[str], OrderedDict[str, SessionBuffer]]" = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, user_id: Optional[str] = None) -> SessionBuffer:
+        with self._lock:
+            sessions = self._buffers.setdefault(user_id, OrderedDict())
+            buffer = sessions.get(session_id)
+            if buffer is None:
+                buffer = sessions[session_id] = SessionBuffer(self.max_turns)
+            sessions.move_to_end(session_id)
+            while len(sessions) > self.max_sessions:
+                sessions.popitem(last=False)
+            return buffer
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = [buffer for user_sessions in self._buffers.values() for buffer in user_sessions.values()]
+            return {
+                "users": len(self._buffers),
+                "sessions": len(sessions),
+                "turns": sum(len(buffer) for buffer in sessions),
+                "max_turns": self.max_turns
+            }
+
+
+_buffers: Optional[SessionBuffers] = None
+_buffers_lock = threading.Lock()
+
+
+def get_session_buffers() -> SessionBuffers:
+    global _buffers
+
+    if _buffers is None:
+        with _buffers_lock:
+            if _buffers is None:
+                from agent.config import MEMORY_HOT_TURNS, MEMORY_HOT_SESSIONS
+                _buffers = SessionBuffers(max_turns=MEMORY_HOT_TURNS, max_sessions=MEMORY_HOT_SESSIONS)
+    return _buffers
+
+
+def get_session_buffer_stats() -> Dict[str, Any]:
+    if _buffers is None:
+        return {"users": 0, "sessions": 0, "turns": 0}
+    return _buffers.stats()
@@ -0,0 +1,129 @@
+import time
+import logging
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_process_start = time.perf_counter()
+_timings_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+
+_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+_ready_after = None
+_warm_up_error = None
+
+
+@contextmanager
+def timed(name: str):
+    """Record how long the block took under `name` in the startup breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _timings_lock:
+            _timings[name] = (time.perf_counter() - start) * 1000
+
+
+def lazy_import(spec: str) -> Any:
+    """Import "module:attribute" and return the attribute, timing the first import of the module."""
+    module_name, attribute = spec.split(":")
+    with timed(f"import {module_name}"):
+        module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+class LazyHandlers(dict):
+    """Tool name -> handler, where a handler given as "module:function" is imported on first lookup.
+
+    Membership tests never import, so routing decisions stay cheap; only executing a tool
+    pays for its module (Spotify, Selenium, Gmail clients).
+    """
+
+    def __init__(self, handlers: Dict[str, Any]):
+        super().__init__(handlers)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Callable:
+        handler = super().__getitem__(name)
+        if isinstance(handler, str):
+            with self._lock:
+                handler = super().__getitem__(name)
+                if isinstance(handler, str):
+                    handler = lazy_import(handler)
+                    self[name] = handler
+        return handler
+
+
+def _warm_up():
+    global _ready_after, _warm_up_error
+
+    from agent.config import SEMANTIC_CACHE_ENABLED, INTENT_CLASSIFIER_ENABLED
+
+    try:
+        with timed("import agent.chromaMemory"):
+            from agent.chromaMemory import init_memory, sync_about_file, warm_start_from_snapshot
+        with timed("memory init"):
+            init_memory()
+        with timed("snapshot warm start"):
+            warm_start_from_snapshot()
+        with timed("about sync"):
+            sync_about_file(force=True)
+
+        if SEMANTIC_CACHE_ENABLED:
+            from agent.semantic_cache import get_semantic_cache
+            with timed("semantic cache"):
+                get_semantic_cache()
+
+        if INTENT_CLASSIFIER_ENABLED:
+            from agent.intent_classifier import get_intent_classifier
+            with timed("intent classifier"):
+                get_intent_classifier()
+
+    except Exception as e:
+        logger.exception("Warm-up failed, embedding-based routing stays disabled:")
+        _warm_up_error = str(e)
+        return
+
+    _ready_after = (time.perf_counter() - _process_start) * 1000
+    _ready.set()
+    logger.info(f"Warm-up finished, BitBud fully ready after {_ready_after:.0f} ms")
+
+    # Retention shares the memory store, so start it only once the store is open
+    from agent.retention import start_retention_scheduler
+    start_retention_scheduler()
+
+
+def start_warm_up():
+    """Load the embedding model, Chroma stores and embedding routers in a background thread (once)."""
+    global _warm_up_thread
+
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, daemon=True, name="mitchi-warm-up")
+            _warm_up_thread.start()
+
+
+def is_ready() -> bool:
+    """True once the embedding model and the embedding-based routers are loaded."""
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout: float = None) -> bool:
+    start_warm_up()
+    return _ready.wait(timeout)
+
+
+def get_startup_stats() -> Dict[str, Any]:
+    with _timings_lock:
+        timings = {name: round(ms, 1) for name, ms in _timings.items()}
+    return {
+        "ready": is_ready(),
+        "ready_after_ms": round(_ready_after, 1) if _ready_after is not None else None,
+        "warm_up_error": _warm_up_error,
+        "timings_ms": timings
+    }
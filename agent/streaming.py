@@ -0,0 +1,70 @@
+import json
+import queue
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Set while a graph run is being streamed; graph nodes report progress through emit_event
+_event_sink: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar("mitchi_event_sink", default=None)
+
+_END = object()
+
+
+def is_streaming() -> bool:
+    return _event_sink.get() is not None
+
+
+def emit_event(event: str, data: Dict[str, Any] = None):
+    """Report a progress event (planning_done, tool_started, tool_finished, token) to the active stream, if any."""
+    sink = _event_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(event, data or {})
+    except Exception as e:
+        logger.error(f"Failed to emit stream event {event}: {e}")
+
+
+def stream_graph(graph, user_input: str, state: Dict[str, Any] = None,
+                 on_finish: Optional[Callable[[], None]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Start the graph in a worker thread and return an iterator of (event, data) as they happen,
+    ending with done or error. `on_finish` is called from the worker once the run is over, even
+    when the iterator is abandoned early (client disconnected)."""
+    events = queue.Queue()
+
+    def run():
+        token = _event_sink.set(lambda event, data: events.put((event, data)))
+        try:
+            result = graph.invoke({"input": user_input, **(state or {})})
+            reply = result.get("output", "I'm having trouble processing that right now.")
+            events.put(("done", {"reply": reply}))
+        except Exception:
+            # Logged in full, the client gets the same fixed message as the HTTP handlers' errors
+            logger.exception("Streaming graph run failed:")
+            events.put(("error", {
+                "error": "Something went wrong processing your request.",
+                "reply": "I'm experiencing technical difficulties. Please try again."
+            }))
+        finally:
+            _event_sink.reset(token)
+            events.put(_END)
+            if on_finish is not None:
+                on_finish()
+
+    threading.Thread(target=run, daemon=True, name="mitchi-stream").start()
+    return _drain(events)
+
+
+def _drain(events: queue.Queue) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    while True:
+        item = events.get()
+        if item is _END:
+            break
+        yield item
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -9,12 +9,21 @@ import os
 
 load_dotenv()
 
-sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-    client_id=os.getenv("SPOTIPY_CLIENT_ID"),
-    client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
-    redirect_uri=os.getenv("SPOTIPY_REDIRECT_URI"),
-    scope="user-read-playback-state,user-modify-playback-state"
-))
+_sp = None
+
+
+def get_spotify():
+    """Spotify client, built on first use so importing this module doesn't start OAuth."""
+    global _sp
+
+    if _sp is None:
+        _sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
+            client_id=os.getenv("SPOTIPY_CLIENT_ID"),
+            client_secret=os.getenv("SPOTIPY_CLIENT_SECRET"),
+            redirect_uri=os.getenv("SPOTIPY_REDIRECT_URI"),
+            scope="user-read-playback-state,user-modify-playback-state"
+        ))
+    return _sp
 
 
 def open_app(app_name: str, query: str = ""):
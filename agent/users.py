@@ -0,0 +1,16 @@
+import re
+from agent.config import DEFAULT_USER_ID
+
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.@-]{1,64}$")
+
+
+def normalize_user_id(value) -> str:
+    """user_id of an /ask payload: DEFAULT_USER_ID when missing, ValueError when malformed.
+
+    The id ends up in Chroma `where` filters and log lines, so only a conservative charset is accepted.
+    """
+    if value is None or value == "":
+        return DEFAULT_USER_ID
+    if not isinstance(value, str) or not _USER_ID_PATTERN.match(value):
+        raise ValueError("user_id must be 1-64 characters of letters, digits, '_', '.', '@' or '-'")
+    return value
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import logging
+import tempfile
+import threading
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorStore:
+    """Exact in-process vector store for small collections.
+
+    Rows are kept L2-normalised in one contiguous float32 matrix, so top-k is a single
+    matrix-vector product. Persists to `<path>.npy` (vectors) and `<path>.json` (ids, texts, metadata).
+    Implements the subset of the LangChain Chroma API chromaMemory uses.
+
+    Updates are written at most once per `save_interval` seconds (and at exit), one writer at a
+    time, so the .npy and .json on disk always hold the same version of the store.
+    """
+
+    def __init__(self, embedding_function, persist_path: Optional[str] = None, save_interval: float = 5.0):
+        self.embedding_function = embedding_function
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._version = 0
+        self._saved_version = -1  # The first save always writes, even an empty store
+        self._last_save = 0.0
+        if persist_path:
+            atexit.register(self.save)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add_embeddings(self, ids: List[str], vectors: np.ndarray, documents: List[str],
+                       metadatas: Optional[List[Optional[Dict[str, Any]]]] = None):
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            # Same id again replaces the old row, as in Chroma's upsert
+            replaced = set(ids)
+            if replaced & set(self._ids):
+                self._drop(replaced)
+            self._matrix = vectors if not self._ids else np.vstack([self._matrix, vectors])
+            self._ids.extend(ids)
+            self._documents.extend(documents)
+            self._metadatas.extend(metadatas)
+            self._version += 1
+        self._save_soon()
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.add_embeddings(ids, self.embedding_function.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def _drop(self, ids: set):
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in ids]
+        self._matrix = self._matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        self._ids = [self._ids[i] for i in keep]
+        self._documents = [self._documents[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+
+    def delete(self, ids: List[str] = None):
+        with self._lock:
+            self._drop(set(ids or []))
+            self._version += 1
+        self._save_soon()
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            rows = range(len(self._ids)) if ids is None else [i for i, doc_id in enumerate(self._ids) if doc_id in set(ids)]
+            result = {"ids": [self._ids[i] for i in rows]}
+            if "documents" in include:
+                result["documents"] = [self._documents[i] for i in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[i] for i in rows]
+            if "embeddings" in include:
+                result["embeddings"] = self._matrix[list(rows)] if len(rows) else np.zeros((0, 0), dtype=np.float32)
+        return result
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            if not self._ids:
+                return []
+            scores = self._matrix @ query
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [Document(page_content=self._documents[i], metadata=self._metadatas[i] or {}) for i in top]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k)
+
+    def _save_soon(self):
+        if time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def _write_temp(self, suffix: str, write: Callable[[Any], None], binary: bool) -> str:
+        """Write to a unique temporary file next to the store and return its path."""
+        directory = os.path.dirname(self.persist_path) or "."
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.persist_path) + ".", suffix=suffix + ".tmp")
+        try:
+            with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+                write(f)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def save(self):
+        """Write the store out if it changed since the last save."""
+        with self._save_lock:
+            if not self.persist_path:
+                return
+            with self._lock:
+                if self._version == self._saved_version:
+                    return
+                version = self._version
+                matrix = self._matrix  # Replaced, never modified in place, so no copy is needed
+                records = {"ids": list(self._ids), "documents": list(self._documents), "metadatas": list(self._metadatas)}
+
+            try:
+                os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+                matrix_temp = self._write_temp(".npy", lambda f: np.save(f, matrix), binary=True)
+                try:
+                    records_temp = self._write_temp(".json", lambda f: json.dump(records, f), binary=False)
+                except BaseException:
+                    os.remove(matrix_temp)
+                    raise
+                os.replace(matrix_temp, self.persist_path + ".npy")
+                os.replace(records_temp, self.persist_path + ".json")
+            except Exception as e:
+                logger.error(f"Failed to persist vector store {self.persist_path}: {e}")
+                return
+            self._saved_version = version
+            self._last_save = time.time()
+
+    def exists(self) -> bool:
+        return bool(self.persist_path) and os.path.exists(self.persist_path + ".npy") and os.path.exists(self.persist_path + ".json")
+
+    def load(self):
+        if not self.exists():
+            return
+        matrix = np.load(self.persist_path + ".npy").astype(np.float32)
+        with open(self.persist_path + ".json", "r", encoding="utf-8") as f:
+            records = json.load(f)
+        with self._lock:
+            self._matrix = matrix
+            self._ids = records["ids"]
+            self._documents = records["documents"]
+            self._metadatas = records["metadatas"]
+            self._version += 1
+            self._saved_version = self._version
+        logger.info(f"Loaded {len(self._ids)} vectors from {self.persist_path}.npy")
+
+    def remove_files(self):
+        """Delete the persisted files; the store is no longer saved afterwards."""
+        with self._save_lock:
+            for suffix in (".npy", ".json"):
+                if self.persist_path and os.path.exists(self.persist_path + suffix):
+                    os.remove(self.persist_path + suffix)
+            self.persist_path = None
+
+
+class AdaptiveVectorStore:
+    """NumpyVectorStore while the collection has at most `max_numpy_rows` rows, Chroma beyond that.
+
+    The switch copies the stored vectors over (nothing is re-embedded) and is one-way. An existing
+    Chroma collection small enough for NumPy is moved over when the store is opened.
+    """
+
+    def __init__(self, embedding_function, numpy_path: str, chroma_factory: Callable[[], Any],
+                 max_numpy_rows: int = 2000):
+        self.max_numpy_rows = max_numpy_rows
+        self._chroma_factory = chroma_factory
+        self._lock = threading.Lock()
+        numpy_store = NumpyVectorStore(embedding_function, numpy_path)
+
+        if numpy_store.exists():
+            numpy_store.load()
+            self.backend = numpy_store
+        else:
+            chroma = chroma_factory()
+            existing = chroma.get(include=["embeddings", "documents", "metadatas"])
+            if len(existing["ids"]) > max_numpy_rows:
+                self.backend = chroma
+            else:
+                if existing["ids"]:
+                    numpy_store.add_embeddings(existing["ids"], existing["embeddings"], existing["documents"], existing["metadatas"])
+                    print(f"[Memory] Moved {len(existing['ids'])} vectors from Chroma to {numpy_path}.npy")
+                numpy_store.save()
+                chroma.delete_collection()
+                self.backend = numpy_store
+
+    @property
+    def backend_name(self) -> str:
+        return "numpy" if isinstance(self.backend, NumpyVectorStore) else "chroma"
+
+    def _switch_to_chroma(self):
+        numpy_store = self.backend
+        rows = numpy_store.get(include=["embeddings", "documents", "metadatas"])
+        chroma = self._chroma_factory()
+        add = {"ids": rows["ids"], "embeddings": rows["embeddings"].tolist(), "documents": rows["documents"]}
+        if any(rows["metadatas"]):
+            add["metadatas"] = [metadata or {"source": "unknown"} for metadata in rows["metadatas"]]
+        chroma._collection.add(**add)
+        numpy_store.remove_files()
+        self.backend = chroma
+        print(f"[Memory] Collection grew past {self.max_numpy_rows} rows, switched to Chroma")
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None) -> List[str]:
+        with self._lock:
+            ids = self.backend.add_texts(texts, metadatas=metadatas, ids=ids)
+            if isinstance(self.backend, NumpyVectorStore) and len(self.backend) > self.max_numpy_rows:
+                self._switch_to_chroma()
+            return ids
+
+    def add_embeddings(self, ids: List[str], vectors: np.ndarray, documents: List[str],
+                       metadatas: Optional[List[Optional[Dict[str, Any]]]] = None):
+        """Add precomputed vectors (snapshot import) without re-embedding the documents."""
+        with self._lock:
+            if isinstance(self.backend, NumpyVectorStore):
+                self.backend.add_embeddings(ids, vectors, documents, metadatas)
+                if len(self.backend) > self.max_numpy_rows:
+                    self._switch_to_chroma()
+                return
+            add = {"ids": ids, "embeddings": np.asarray(vectors, dtype=np.float32).tolist(), "documents": documents}
+            if metadatas and any(metadatas):
+                add["metadatas"] = [metadata or {"source": "unknown"} for metadata in metadatas]
+            self.backend._collection.upsert(**add)
+
+    def delete(self, ids: List[str] = None):
+        self.backend.delete(ids)
+
+    def get(self, **kwargs) -> Dict[str, Any]:
+        return self.backend.get(**kwargs)
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return self.backend.similarity_search(query, k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        return self.backend.similarity_search_by_vector(embedding, k=k)
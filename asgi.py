@@ -0,0 +1,363 @@
+import json
+import asyncio
+import logging
+import traceback
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from agent.startup import timed, start_warm_up
+with timed("import agent.langGraphRouter"):
+    from agent.langGraphRouter import build_graph, validate_tool_chain
+from agent.intent_classifier import add_exemplar, get_intent_classifier_stats
+from agent.metrics import collect_stats
+from agent.streaming import stream_graph, format_sse
+from agent.batch import ask_batch
+from agent.users import normalize_user_id
+from agent.config import ASGI_MAX_IN_FLIGHT, ASGI_MAX_QUEUE, ASGI_QUEUE_TIMEOUT, ASGI_TOOL_THREADS, BATCH_MAX_ITEMS
+
+# Run with: uvicorn asgi:app --port 5001
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('bitbud.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class AdmissionController:
+    """At most `max_in_flight` graph runs at once and at most `max_queue` requests waiting for a slot.
+
+    A full queue is rejected immediately with 429; a request that waited `queue_timeout`
+    seconds without getting a slot is rejected with 503. A slot is held until the graph run
+    finishes, not until the client goes away: a disconnect does not stop the worker thread,
+    so releasing early would let Ollama see more than `max_in_flight` runs.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = {429: 0, 503: 0}
+
+    async def _acquire(self):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected[429] += 1
+            raise Overloaded(429, "BitBud is busy, too many requests queued. Please retry shortly.")
+
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # Free slot, does not suspend
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected[503] += 1
+                raise Overloaded(503, "BitBud is overloaded, request timed out in queue. Please retry shortly.")
+            finally:
+                self.waiting -= 1
+
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def run(self, start: Callable[[], Awaitable[Any]]) -> Any:
+        """Take a slot, then await `start()`; the slot is freed when that work completes, even if
+        the request awaiting it is cancelled first."""
+        await self._acquire()
+        try:
+            task = asyncio.ensure_future(start())
+        except BaseException:
+            self._release()
+            raise
+        task.add_done_callback(lambda _: self._release())
+        return await asyncio.shield(task)
+
+    async def hold(self) -> Callable[[], None]:
+        """Take a slot for work running in another thread; returns the thread-safe release callback."""
+        await self._acquire()
+        loop = asyncio.get_running_loop()
+
+        def release():
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                pass  # Loop already closed at shutdown
+
+        return release
+
+    def stats(self):
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": dict(self.rejected)
+        }
+
+
+admission = AdmissionController(ASGI_MAX_IN_FLIGHT, ASGI_MAX_QUEUE, ASGI_QUEUE_TIMEOUT)
+
+# Initialize graph
+try:
+    with timed("build graph"):
+        graph = build_graph()
+    logger.info("BitBud graph initialized successfully")
+except Exception as e:
+    logger.error(f"Failed to initialize graph: {e}")
+    graph = None
+
+# Embedding model, Chroma and the embedding routers load in the background;
+# fast-path and LLM routing serve requests meanwhile
+start_warm_up()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync graph nodes and blocking tools (psutil, subprocess, Gmail, Selenium) run on the
+    # loop's default executor when the graph is awaited, so size that pool explicitly.
+    executor = ThreadPoolExecutor(max_workers=ASGI_TOOL_THREADS, thread_name_prefix="mitchi-tool")
+    asyncio.get_running_loop().set_default_executor(executor)
+    logger.info(f"Starting BitBud ASGI backend (in-flight limit {ASGI_MAX_IN_FLIGHT}, queue {ASGI_MAX_QUEUE}, tool threads {ASGI_TOOL_THREADS})")
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _overloaded_response(e: Overloaded) -> JSONResponse:
+    return JSONResponse({"error": e.message}, status_code=e.status_code, headers={"Retry-After": "5"})
+
+
+async def _read_json(request: Request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+async def _read_message(request: Request):
+    """Validate the /ask payload (or GET query) the same way the Flask backend does.
+    Returns (message, user_id, error response)."""
+    payload = dict(request.query_params) if request.method == "GET" else await _read_json(request)
+    if not isinstance(payload, dict):
+        logger.warning("Received non-JSON request")
+        return None, None, JSONResponse({"error": "Request must be JSON"}, status_code=400)
+
+    user_input = str(payload.get("message", "")).strip()
+    if not user_input:
+        logger.warning("Received empty message")
+        return None, None, JSONResponse({"error": "Message cannot be empty"}, status_code=400)
+
+    try:
+        user_id = normalize_user_id(payload.get("user_id"))
+    except ValueError as e:
+        return None, None, JSONResponse({"error": str(e)}, status_code=400)
+
+    if graph is None:
+        logger.error("Graph not initialized, cannot process request")
+        return None, None, JSONResponse({"error": "BitBud is not ready. Please restart the service. If the issue persists, check the logs or contact support."}, status_code=503)
+
+    return user_input, user_id, None
+
+
+@app.get("/", response_class=PlainTextResponse)
+async def home():
+    return "BitBud backend is running!"
+
+
+@app.get("/stats")
+async def stats():
+    return {**collect_stats(), "serving": admission.stats()}
+
+
+async def _stream_events(user_input: str, user_id: str):
+    """(event, data) of a streamed graph run, in an admission slot held until its worker thread ends."""
+    release = await admission.hold()
+    try:
+        stream = stream_graph(graph, user_input, {"user_id": user_id}, on_finish=release)
+    except BaseException:
+        release()
+        raise
+    async for item in iterate_in_threadpool(stream):
+        yield item
+
+
+@app.post("/intent/exemplars")
+async def add_intent_exemplar(request: Request):
+    """Record a confirmed routing (message -> tool_chain) for the nearest-neighbour intent classifier."""
+    payload = await _read_json(request)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "Request must be JSON"}, status_code=400)
+
+    user_input = payload.get("message")
+    if not isinstance(user_input, str) or not user_input.strip():
+        return JSONResponse({"error": "message must be a non-empty string"}, status_code=400)
+    try:
+        tool_chain = validate_tool_chain(payload.get("tool_chain"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    try:
+        # Embeds the utterance (and may load the model), so keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, add_exemplar, user_input.strip(), tool_chain)
+        return {"status": "ok", **get_intent_classifier_stats()}
+    except Exception as e:
+        logger.error(f"Failed to add intent exemplar: {e}")
+        return JSONResponse({"error": "Could not add exemplar"}, status_code=500)
+
+
+@app.post("/ask")
+async def ask(request: Request):
+    user_input, user_id, error = await _read_message(request)
+    if error is not None:
+        return error
+
+    try:
+        logger.info(f"Processing user input: {user_input}...")
+        result = await admission.run(lambda: graph.ainvoke({"input": user_input, "user_id": user_id}))
+
+        reply = result.get("output", "I'm having trouble processing that right now.")
+        logger.info(f"Generated reply: {reply[:50]}...")
+        return {"reply": reply}
+
+    except Overloaded as e:
+        logger.warning(f"Rejected request with {e.status_code}: {e.message}")
+        return _overloaded_response(e)
+
+    except Exception as e:
+        logger.error(f"Error processing request: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return JSONResponse({
+            "error": "Something went wrong processing your request.",
+            "reply": "I'm experiencing technical difficulties. Please try again."
+        }, status_code=500)
+
+
+@app.post("/ask/batch")
+async def ask_batch_endpoint(request: Request):
+    """{"messages": [...], "parallelism": n} -> {"results": [...]} in input order, with per-item timings."""
+    payload = await _read_json(request)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "Request must be JSON"}, status_code=400)
+
+    messages = payload.get("messages")
+    if not isinstance(messages, list) or not messages:
+        return JSONResponse({"error": "messages must be a non-empty list"}, status_code=400)
+    if len(messages) > BATCH_MAX_ITEMS:
+        return JSONResponse({"error": f"At most {BATCH_MAX_ITEMS} messages per batch"}, status_code=400)
+
+    messages = [str(message).strip() for message in messages]
+    if not all(messages):
+        return JSONResponse({"error": "Message cannot be empty"}, status_code=400)
+
+    parallelism = payload.get("parallelism")
+    if parallelism is not None and (isinstance(parallelism, bool) or not isinstance(parallelism, int) or parallelism < 1):
+        return JSONResponse({"error": "parallelism must be a positive integer"}, status_code=400)
+
+    try:
+        user_id = normalize_user_id(payload.get("user_id"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if graph is None:
+        return JSONResponse({"error": "BitBud is not ready. Please restart the service. If the issue persists, check the logs or contact support."}, status_code=503)
+
+    try:
+        # A batch holds one in-flight slot; its own thread pool bounds the Ollama parallelism
+        logger.info(f"Processing batch of {len(messages)} messages...")
+        results = await admission.run(
+            lambda: asyncio.get_running_loop().run_in_executor(None, ask_batch, messages, parallelism, user_id)
+        )
+        return {"results": results}
+
+    except Overloaded as e:
+        return _overloaded_response(e)
+
+    except Exception as e:
+        logger.error(f"Error processing batch request: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return JSONResponse({"error": "Something went wrong processing your batch request."}, status_code=500)
+
+
+@app.api_route("/ask/stream", methods=["GET", "POST"])
+async def ask_stream(request: Request):
+    """Server-Sent Events, same events as the Flask backend's /ask/stream."""
+    user_input, user_id, error = await _read_message(request)
+    if error is not None:
+        return error
+
+    async def events():
+        try:
+            async for event, data in _stream_events(user_input, user_id):
+                yield format_sse(event, data)
+        except Overloaded as e:
+            yield format_sse("error", {"error": e.message, "status": e.status_code})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.websocket("/ask/ws")
+async def ask_ws(websocket: WebSocket):
+    """WebSocket: send {"message": ...}, receive {"event": ..., "data": ...} frames until done/error."""
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                payload = json.loads(await websocket.receive_text())
+                user_input = str(payload.get("message", "")).strip()
+            except (ValueError, AttributeError):
+                await websocket.send_json({"event": "error", "data": {"error": "Request must be JSON"}})
+                continue
+
+            if not user_input:
+                await websocket.send_json({"event": "error", "data": {"error": "Message cannot be empty"}})
+                continue
+
+            try:
+                user_id = normalize_user_id(payload.get("user_id"))
+            except ValueError as e:
+                await websocket.send_json({"event": "error", "data": {"error": str(e)}})
+                continue
+
+            if graph is None:
+                await websocket.send_json({"event": "error", "data": {"error": "BitBud is not ready. Please restart the service."}})
+                continue
+
+            try:
+                async for event, data in _stream_events(user_input, user_id):
+                    await websocket.send_text(json.dumps({"event": event, "data": data}, default=str))
+            except Overloaded as e:
+                await websocket.send_json({"event": "error", "data": {"error": e.message, "status": e.status_code}})
+
+    except WebSocketDisconnect:
+        logger.info("WebSocket client disconnected")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logger.info("Starting BitBud ASGI backend on port 5001")
+    uvicorn.run(app, port=5001)
@@ -0,0 +1,106 @@
+"""Compare the CPU embedding backends of agent.embeddings: throughput, memory and agreement.
+
+    python benchmarks/bench_embeddings.py [--texts 2000] [--backends sentence-transformers onnx onnx-int8]
+
+Model path, batch size, threads and max sequence length come from the MITCHI_EMBEDDING_* settings.
+Each backend runs in its own process, so the reported peak RSS is that backend's alone.
+Agreement is the mean cosine similarity to the first backend's vectors for the same texts.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_UTTERANCES = [
+    "remind me to call mom tomorrow at 6",
+    "what's the weather like in Pune this weekend",
+    "play some lofi music on spotify",
+    "my manager's name is Priyanka and she prefers email over slack",
+    "summarize the unread emails from this morning",
+    "I started learning the guitar last month, mostly fingerstyle",
+    "turn the volume down a bit",
+    "the wifi password at the office is on the whiteboard near the kitchen",
+    "can you open vscode and the project folder",
+    "I'm allergic to peanuts, keep that in mind when suggesting recipes",
+]
+
+
+def make_texts(count: int, seed: int = 0) -> list:
+    """Conversation-like texts of mixed length, built from the sample utterances."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLE_UTTERANCES) for _ in range(rng.randint(1, 4))) for _ in range(count)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(backend: str, count: int) -> dict:
+    from agent.embeddings import create_embeddings
+
+    texts = make_texts(count)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    embeddings = create_embeddings(backend)
+    load_s = time.perf_counter() - start
+    embeddings.embed_documents(texts[:32])  # Warm-up: lazy kernels, thread pools
+
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts[:200]:
+        embeddings.embed_query(text)
+    single_s = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "batched_per_s": len(texts) / batch_s,
+        "single_per_s": min(200, len(texts)) / single_s,
+        "peak_rss_mb": peak_rss_mb(),
+        "model_rss_mb": peak_rss_mb() - rss_before,
+        "vectors": vectors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", default=["sentence-transformers", "onnx", "onnx-int8"])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in args.backends:
+        with context.Pool(1) as pool:
+            try:
+                results.append(pool.apply(run_backend, (backend, args.texts)))
+            except Exception as e:
+                print(f"{backend}: failed ({type(e).__name__}: {e})")
+
+    if not results:
+        return
+
+    baseline = results[0]["vectors"]
+    baseline_unit = baseline / np.maximum(np.linalg.norm(baseline, axis=1, keepdims=True), 1e-12)
+    print(f"{args.texts} texts, agreement vs {results[0]['backend']}\n")
+    print(f"{'backend':<22}{'load s':>8}{'batched/s':>12}{'single/s':>10}{'peak RSS MB':>13}{'model MB':>10}{'agreement':>11}")
+    for result in results:
+        unit = result["vectors"] / np.maximum(np.linalg.norm(result["vectors"], axis=1, keepdims=True), 1e-12)
+        agreement = float((unit * baseline_unit).sum(axis=1).mean())
+        print(f"{result['backend']:<22}{result['load_s']:>8.2f}{result['batched_per_s']:>12.1f}{result['single_per_s']:>10.1f}"
+              f"{result['peak_rss_mb']:>13.0f}{result['model_rss_mb']:>10.0f}{agreement:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
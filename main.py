@@ -1,5 +1,14 @@
-from flask import Flask, request, jsonify
-from agent.langGraphRouter import build_graph
+import json
+from flask import Flask, Response, request, jsonify, stream_with_context
+from agent.startup import timed, start_warm_up
+with timed("import agent.langGraphRouter"):
+    from agent.langGraphRouter import build_graph, validate_tool_chain
+from agent.intent_classifier import add_exemplar, get_intent_classifier_stats
+from agent.metrics import collect_stats
+from agent.streaming import stream_graph, format_sse
+from agent.batch import ask_batch
+from agent.users import normalize_user_id
+from agent.config import BATCH_MAX_ITEMS
 import logging
 import traceback
 
@@ -17,18 +26,55 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 # CORS(app)
 
+try:
+    from flask_sock import Sock
+    sock = Sock(app)
+except ImportError:
+    logger.warning("flask-sock not installed, WebSocket endpoint /ask/ws disabled")
+    sock = None
+
 # Initialize graph
 try:
-    graph = build_graph()
+    with timed("build graph"):
+        graph = build_graph()
     logger.info("BitBud graph initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize graph: {e}")
     graph = None
 
+# Embedding model, Chroma and the embedding routers load in the background;
+# fast-path and LLM routing serve requests meanwhile
+start_warm_up()
+
 @app.route("/")
 def home():
     return "BitBud backend is running!"
 
+@app.route("/stats")
+def stats():
+    return jsonify(collect_stats())
+
+@app.route("/intent/exemplars", methods=["POST"])
+def add_intent_exemplar():
+    """Record a confirmed routing (message -> tool_chain) for the nearest-neighbour intent classifier."""
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    user_input = request.json.get("message")
+    if not isinstance(user_input, str) or not user_input.strip():
+        return jsonify({"error": "message must be a non-empty string"}), 400
+    try:
+        tool_chain = validate_tool_chain(request.json.get("tool_chain"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        add_exemplar(user_input.strip(), tool_chain)
+        return jsonify({"status": "ok", **get_intent_classifier_stats()})
+    except Exception as e:
+        logger.error(f"Failed to add intent exemplar: {e}")
+        return jsonify({"error": "Could not add exemplar"}), 500
+
 @app.route("/ask", methods=["POST"])
 def ask():
     try:
@@ -42,6 +88,11 @@ def ask():
         if not user_input:
             logger.warning("Received empty message")
             return jsonify({"error": "Message cannot be empty"}), 400
+
+        try:
+            user_id = normalize_user_id(request.json.get("user_id"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Check if graph is available
         if graph is None:
@@ -51,7 +102,7 @@ def ask():
         logger.info(f"Processing user input: {user_input}...")
         
         # Process with graph
-        result = graph.invoke({"input": user_input})
+        result = graph.invoke({"input": user_input, "user_id": user_id})
         reply = result.get("output", "I'm having trouble processing that right now.")
         
         logger.info(f"Generated reply: {reply[:50]}...")
@@ -66,6 +117,110 @@ def ask():
             "reply": "I'm experiencing technical difficulties. Please try again."
         }), 500
 
+@app.route("/ask/batch", methods=["POST"])
+def ask_batch_endpoint():
+    """{"messages": [...], "parallelism": n} -> {"results": [...]} in input order, with per-item timings."""
+    try:
+        if not request.is_json:
+            logger.warning("Received non-JSON request")
+            return jsonify({"error": "Request must be JSON"}), 400
+
+        messages = request.json.get("messages")
+        if not isinstance(messages, list) or not messages:
+            return jsonify({"error": "messages must be a non-empty list"}), 400
+        if len(messages) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"At most {BATCH_MAX_ITEMS} messages per batch"}), 400
+
+        messages = [str(message).strip() for message in messages]
+        if not all(messages):
+            return jsonify({"error": "Message cannot be empty"}), 400
+
+        parallelism = request.json.get("parallelism")
+        if parallelism is not None and (isinstance(parallelism, bool) or not isinstance(parallelism, int) or parallelism < 1):
+            return jsonify({"error": "parallelism must be a positive integer"}), 400
+
+        try:
+            user_id = normalize_user_id(request.json.get("user_id"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if graph is None:
+            logger.error("Graph not initialized, cannot process request")
+            return jsonify({"error": "BitBud is not ready. Please restart the service. If the issue persists, check the logs or contact support."}), 503
+
+        logger.info(f"Processing batch of {len(messages)} messages...")
+        return jsonify({"results": ask_batch(messages, parallelism, user_id)})
+
+    except Exception as e:
+        logger.error(f"Error processing batch request: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return jsonify({"error": "Something went wrong processing your batch request."}), 500
+
+@app.route("/ask/stream", methods=["GET", "POST"])
+def ask_stream():
+    """Server-Sent Events: planning_done, tool_started, tool_finished, token..., then done (or error)."""
+    if request.method == "POST":
+        if not request.is_json:
+            return jsonify({"error": "Request must be JSON"}), 400
+        user_input = request.json.get("message", "").strip()
+        raw_user_id = request.json.get("user_id")
+    else:
+        user_input = request.args.get("message", "").strip()
+        raw_user_id = request.args.get("user_id")
+
+    if not user_input:
+        return jsonify({"error": "Message cannot be empty"}), 400
+
+    try:
+        user_id = normalize_user_id(raw_user_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if graph is None:
+        logger.error("Graph not initialized, cannot process request")
+        return jsonify({"error": "BitBud is not ready. Please restart the service. If the issue persists, check the logs or contact support."}), 503
+
+    logger.info(f"Streaming user input: {user_input}...")
+
+    def events():
+        for event, data in stream_graph(graph, user_input, {"user_id": user_id}):
+            yield format_sse(event, data)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+if sock is not None:
+    @sock.route("/ask/ws")
+    def ask_ws(ws):
+        """WebSocket: send {"message": ...}, receive {"event": ..., "data": ...} frames until done/error."""
+        while True:
+            try:
+                payload = json.loads(ws.receive())
+                user_input = str(payload.get("message", "")).strip()
+            except (TypeError, ValueError, AttributeError):
+                ws.send(json.dumps({"event": "error", "data": {"error": "Request must be JSON"}}))
+                continue
+
+            if not user_input:
+                ws.send(json.dumps({"event": "error", "data": {"error": "Message cannot be empty"}}))
+                continue
+
+            try:
+                user_id = normalize_user_id(payload.get("user_id"))
+            except ValueError as e:
+                ws.send(json.dumps({"event": "error", "data": {"error": str(e)}}))
+                continue
+
+            if graph is None:
+                ws.send(json.dumps({"event": "error", "data": {"error": "BitBud is not ready. Please restart the service."}}))
+                continue
+
+            logger.info(f"WebSocket user input: {user_input}...")
+            for event, data in stream_graph(graph, user_input, {"user_id": user_id}):
+                ws.send(json.dumps({"event": event, "data": data}, default=str))
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -0,0 +1,32 @@
+import numpy as np
+from agent.embedding_cache import EmbeddingFileStore
+
+
+def test_reload_after_torn_write_keeps_keys_aligned(tmp_path):
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    store.put_many(["a", "b"], np.array([[1, 1], [2, 2]], dtype=np.float32))
+
+    # Crash after the vector append, before its key reached keys.txt
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.array([9, 9], dtype=np.float32).tobytes())
+
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    assert len(store) == 2
+    store.put_many(["c"], np.array([[3, 3]], dtype=np.float32))
+    assert store.get("c").tolist() == [3, 3]
+
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    assert [store.get(key).tolist() for key in "abc"] == [[1, 1], [2, 2], [3, 3]]
+
+
+def test_reload_after_key_without_vector(tmp_path):
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    store.put_many(["a"], np.array([[1, 1]], dtype=np.float32))
+    with open(tmp_path / "keys.txt", "a", encoding="utf-8") as f:
+        f.write("orphan\n")
+
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    assert store.get("orphan") is None
+    store.put_many(["b"], np.array([[2, 2]], dtype=np.float32))
+    store = EmbeddingFileStore(str(tmp_path), "model")
+    assert [store.get(key).tolist() for key in "ab"] == [[1, 1], [2, 2]]
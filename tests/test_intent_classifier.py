@@ -0,0 +1,16 @@
+from agent.intent_classifier import chain_is_grounded
+
+ALARM = [{"function": "clock", "args": {"type": "alarm", "hour": 6, "minute": 30, "objective": "wake up"}}]
+
+
+def test_grounding_needs_whole_tokens():
+    assert chain_is_grounded(ALARM, "set alarm for 6:30 to wake up", "set alarm for 6:30 to wake up")
+    assert not chain_is_grounded(ALARM, "set alarm for 16:30 to wake up", "set alarm for 6:30 to wake up")
+
+
+def test_grounding_needs_the_same_meridiem():
+    source = "set alarm for 6:30 AM to wake up"
+    assert chain_is_grounded(ALARM, "set alarm for 6:30 am to wake up", source)
+    assert not chain_is_grounded(ALARM, "set alarm for 6:30 PM to wake up", source)
+    assert not chain_is_grounded(ALARM, "set alarm for 6:30 p.m. to wake up", source)
+    assert not chain_is_grounded(ALARM, "set alarm for 6:30 in the evening to wake up", source)
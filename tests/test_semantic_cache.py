@@ -0,0 +1,30 @@
+import numpy as np
+from agent.semantic_cache import SemanticCache
+
+
+class ConstantEmbeddings:
+    """Every utterance embeds to the same vector, so only grounding decides a hit."""
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+ALARM = [{"function": "clock", "args": {"type": "alarm", "hour": 6, "minute": 30, "objective": ""}}]
+
+
+def test_am_alarm_is_not_served_for_pm():
+    cache = SemanticCache(ConstantEmbeddings())
+    cache.put("set alarm for 6:30 am", {}, ALARM)
+
+    assert cache.get("set alarm for 6:30 pm") is None
+    assert cache.get("set alarm for 6:30") is None
+    assert cache.get("set alarm for 16:30 am") is None
+    assert cache.get("set alarm for 6:30 AM")["tool_chain"] == ALARM
+
+
+def test_destructive_routing_is_never_stored():
+    cache = SemanticCache(ConstantEmbeddings())
+    cache.put("shutdown the system", {}, [{"function": "system_control", "args": {"type": "immediate_action", "action": "shutdown"}}])
+
+    assert cache.get("do not shutdown the system") is None
+    assert cache.stats()["not_cacheable"] == 1